@@ -0,0 +1,138 @@
+#!/usr/bin/python
+
+from __future__ import print_function
+
+import csv
+import logging
+import sys
+import tuner
+from tuner.benchmark import (COLUMNS, PASS_PERCENTILE, find_test_data,
+        run_benchmark, summarize)
+
+LOGGER = logging.getLogger('tuner')
+
+def main():
+    try:
+        import argparse
+    except ImportError as e:
+        # Python 2.6 does not provide argparse in the standard library
+        # so load a local copy (taken from Python 2.7)
+        import argparseshim as argparse
+
+    parser = argparse.ArgumentParser(description='Compare search methods ' +
+            'using timing data recorded by exhaustive searches')
+    parser.add_argument('paths', type=str, nargs='*', default=['test_data'],
+            help='CSV files written with --write-csv, or directories ' +
+                 'containing them (default: test_data)',
+            metavar='path')
+    parser.add_argument('-s', '--search-method', type=str, action='append',
+            help='search method to evaluate; may be given more than once ' +
+                 '(default: every method)',
+            metavar='method')
+    parser.add_argument('-r', '--repetitions', type=int,
+            help='number of repetitions assumed when testing whether the ' +
+                 'best point found differs significantly from the optimum ' +
+                 '(default: 10)',
+            metavar='count')
+    parser.add_argument('-b', '--budget', type=int,
+            help='maximum number of points for methods that choose points ' +
+                 'from a budget',
+            metavar='count')
+    parser.add_argument('--seed', type=int,
+            help='seed for the sobol and lhs search methods',
+            metavar='number')
+    parser.add_argument('-n', '--trials', type=int,
+            help='number of times to run each search on each file, with ' +
+                 'a different --seed each time (default: 1)',
+            metavar='count')
+    parser.add_argument('--noise', action='store_true',
+            help='simulate each run of a point by adding random noise ' +
+                 'based on its recorded standard deviation, with a ' +
+                 'different seed in each trial')
+    parser.add_argument('--compile-cost', type=float,
+            help='time assumed to compile each point, for files without a ' +
+                 '"compile time" column (default: 0)',
+            metavar='seconds')
+    parser.add_argument('--slots', type=int,
+            help='number of devices assumed to test points concurrently ' +
+                 'when simulating the wall-clock time of each search ' +
+                 '(default: 1)',
+            metavar='count')
+    parser.add_argument('-j', '--jobs', type=int,
+            help='number of searches to run concurrently, in separate ' +
+                 'processes (default: one per CPU)',
+            metavar='count')
+    parser.add_argument('-o', '--output', type=str,
+            help='write the results table to a file instead of standard ' +
+                 'output',
+            metavar='filename.csv')
+
+    args = parser.parse_args()
+
+    methods = args.search_method or sorted(tuner.METHODS.keys())
+    for method in methods:
+        if method not in tuner.METHODS:
+            print('Unknown search method "{0}"'.format(method),
+                    file=sys.stderr)
+            sys.exit(1)
+
+    if args.jobs is not None and args.jobs <= 0:
+        print('--jobs must be > 0', file=sys.stderr)
+        sys.exit(1)
+
+    if args.slots is not None and args.slots <= 0:
+        print('--slots must be > 0', file=sys.stderr)
+        sys.exit(1)
+
+    if args.trials is not None and args.trials <= 0:
+        print('--trials must be > 0', file=sys.stderr)
+        sys.exit(1)
+
+    files = find_test_data(args.paths)
+    if not files:
+        print('No CSV files found in {0}'.format(', '.join(args.paths)),
+                file=sys.stderr)
+        sys.exit(1)
+
+    options = dict((k, getattr(args, k))
+            for k in ['repetitions', 'budget', 'seed', 'compile_cost',
+                      'slots']
+            if getattr(args, k) is not None)
+
+    out = open(args.output, 'w') if args.output else sys.stdout
+    rows = []
+    try:
+        writer = csv.writer(out)
+        writer.writerow(COLUMNS)
+        for row in run_benchmark(methods, files, options, args.jobs,
+                args.trials or 1, args.noise):
+            rows.append(row)
+            writer.writerow([row[column]
+                             if column not in ('cost', 'wall', 'seconds')
+                             else '{0:.3f}'.format(row[column])
+                             for column in COLUMNS])
+            out.flush()
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    print('', file=sys.stderr)
+    print('{0:<24} {1:>5} {2:>6} {3:>7} {4:>7} {5:>5} {6:>5} {7:>5} '
+          '{8:>10} {9:>8}'.format('method', 'runs', 'passed', 'tests', 'max',
+              'p50%', 'p90%', 'max%', 'wall', 'seconds'), file=sys.stderr)
+    for summary in summarize(rows):
+        print('{0:<24} {1:>5} {2:>6} {3:>7.1f} {4:>7} {5:>5} {6:>5} {7:>5} '
+              '{8:>10.1f} {9:>8.2f}'.format(*summary), file=sys.stderr)
+    print('(A run passes if the best point found is not significantly '
+          'different from the optimum, or is in the top {0}%.  p50%, p90% '
+          'and max% are the median, 90th percentile and maximum of the '
+          'percentile of the best point found.  wall is the average '
+          'simulated wall-clock time of a search, in seconds.)'.format(
+              PASS_PERCENTILE),
+          file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
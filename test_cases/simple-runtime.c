@@ -0,0 +1,26 @@
+#include <stdio.h>
+#include <stdlib.h>
+#include <omp.h>
+
+#define SIZE 1048576
+
+/* Reads its parameters from the NUM_GANGS and VECTOR_LENGTH environment
+ * variables, as set by the tuner's --runtime-params option. */
+int main() {
+    double *A = (double *)malloc(sizeof(double) * SIZE);
+    int num_gangs = atoi(getenv("NUM_GANGS"));
+    int vector_length = atoi(getenv("VECTOR_LENGTH"));
+    double t_start, t_end;
+    #pragma acc data copyin(A[0:SIZE])
+    {
+        t_start = omp_get_wtime();
+        #pragma acc parallel loop num_gangs(num_gangs), vector_length(vector_length)
+        for (int i = 0; i < SIZE; i++) {
+            A[i] = i * i;
+        }
+        t_end = omp_get_wtime();
+    }
+
+    printf("time=%f\n", t_end - t_start);
+    return 0;
+}
@@ -0,0 +1,32 @@
+#include <stdio.h>
+#include <stdlib.h>
+#include <omp.h>
+
+#define SIZE 1048576
+
+/* Runs the kernel as requested by lines of the form
+ * "num_gangs vector_length repetitions" on standard input, as used by the
+ * tuner's --server option. */
+int main() {
+    double *A = (double *)malloc(sizeof(double) * SIZE);
+    int num_gangs, vector_length, reps, r;
+    double t_start, t_end;
+    #pragma acc data copyin(A[0:SIZE])
+    {
+        while (scanf("%d %d %d", &num_gangs, &vector_length, &reps) == 3) {
+            for (r = 0; r < reps; r++) {
+                t_start = omp_get_wtime();
+                #pragma acc parallel loop num_gangs(num_gangs), vector_length(vector_length)
+                for (int i = 0; i < SIZE; i++) {
+                    A[i] = i * i;
+                }
+                t_end = omp_get_wtime();
+
+                printf("time=%f\n", t_end - t_start);
+                fflush(stdout);
+            }
+        }
+    }
+
+    return 0;
+}
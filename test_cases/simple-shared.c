@@ -0,0 +1,24 @@
+#include <stdlib.h>
+#include <omp.h>
+
+#define SIZE 1048576
+
+/* Entry point called by the tuner's --shared-library option */
+double run(int num_gangs, int vector_length) {
+    static double *A = NULL;
+    double t_start, t_end;
+    if (A == NULL) {
+        A = (double *)malloc(sizeof(double) * SIZE);
+    }
+    #pragma acc data copyin(A[0:SIZE])
+    {
+        t_start = omp_get_wtime();
+        #pragma acc parallel loop num_gangs(num_gangs), vector_length(vector_length)
+        for (int i = 0; i < SIZE; i++) {
+            A[i] = i * i;
+        }
+        t_end = omp_get_wtime();
+    }
+
+    return t_end - t_start;
+}
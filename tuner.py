@@ -30,13 +30,51 @@ def main():
             help='search method to use when choosing test points: ' +
                  ', '.join(sorted(tuner.METHODS.keys())),
             metavar='method')
+    parser.add_argument('-b', '--budget', type=int,
+            help='maximum number of points to test, for search methods ' +
+                 'that choose points from a budget (bayes-opt, sobol, lhs; ' +
+                 'default: 30)',
+            metavar='count')
+    parser.add_argument('--seed', type=int,
+            help='seed for the random numbers used by the sobol and lhs ' +
+                 'search methods, to make them choose the same points again',
+            metavar='number')
     parser.add_argument('-r', '--repetitions', type=int,
             help='number of times to run the executable to collect timing info',
             metavar='count')
+    parser.add_argument('-a', '--adaptive', action='store_true',
+            help='stop running a point before --repetitions runs once its ' +
+                 'average time is known precisely enough, or once it is ' +
+                 'significantly slower than the best point so far')
+    parser.add_argument('--ci-width', type=float,
+            help='with --adaptive, stop once the 90%% confidence interval ' +
+                 'for the average is narrower than this fraction of the ' +
+                 'average (default: 0.05)',
+            metavar='fraction')
+    parser.add_argument('--compile-timeout', type=float,
+            help='kill the compile command (and any processes it started) ' +
+                 'if it runs longer than this, and skip the point',
+            metavar='seconds')
+    parser.add_argument('--run-timeout', type=float,
+            help='kill the executable (and any processes it started) if a ' +
+                 'run takes longer than this, and skip the point',
+            metavar='seconds')
+    parser.add_argument('--timeout-factor', type=float,
+            help='kill a run once it takes this many times longer than the ' +
+                 'average time of the best point so far (but not before ' +
+                 '1 second), and record the point as censored',
+            metavar='factor')
     parser.add_argument('-t', '--time-regexp', type=str,
             help='regular expression to identify timing information in the ' +
                  'output produced by the executable',
             metavar='regexp')
+    parser.add_argument('-m', '--all-matches', action='store_true',
+            help='use every time in the output of the executable as a ' +
+                 'separate repetition, not just the first')
+    parser.add_argument('-w', '--warmup', type=int,
+            help='ignore the first count times in the output of each run ' +
+                 'of the executable (default: 0)',
+            metavar='count')
     parser.add_argument('-k', '--kernel-timing', action='store_true',
             help='search the output for timing information produced when a ' +
                  'program is compiled with "-ta=nvidia,time" using pgcc/pgf90')
@@ -52,6 +90,23 @@ def main():
     parser.add_argument('--write-spreadsheet', type=str,
             help='write an Excel XML spreadsheet with results and statistics',
             metavar='filename.xml')
+    parser.add_argument('--store', type=str,
+            help='record every point tested and every run in an SQLite ' +
+                 'database',
+            metavar='filename.db')
+    parser.add_argument('--resume', action='store_true',
+            help='reuse results from the --store database for points ' +
+                 'that have already been tested')
+    parser.add_argument('--noise-seed', type=int,
+            help='when the source is a CSV file of timing data, simulate ' +
+                 'each run by adding random noise based on the recorded ' +
+                 'standard deviation, seeded with this number',
+            metavar='number')
+    parser.add_argument('--compile-cost', type=float,
+            help='when the source is a CSV file of timing data, the time ' +
+                 'assumed to compile each point, for points without a ' +
+                 '"compile time" column (default: 0)',
+            metavar='seconds')
     parser.add_argument('--num-gangs-min', type=int,
             help='minimum allowable value of num_gangs',
             metavar='value')
@@ -64,6 +119,40 @@ def main():
     parser.add_argument('--vector-length-max', type=int,
             help='maximum allowable value of vector_length',
             metavar='value')
+    parser.add_argument('-j', '--compile-jobs', type=int,
+            help='number of points to compile concurrently, each in its own ' +
+                 'build directory (default: 1)',
+            metavar='count')
+    parser.add_argument('--cache-dir', type=str,
+            help='keep compiled executables in this directory and reuse them ' +
+                 'in later sessions',
+            metavar='directory')
+    parser.add_argument('--cache-size', type=int,
+            help='maximum size of the executable cache in megabytes; least ' +
+                 'recently used executables are removed (default: 1024)',
+            metavar='megabytes')
+    parser.add_argument('--runtime-params', action='store_true',
+            help='compile the program only once and pass num_gangs and ' +
+                 'vector_length when it runs, in the NUM_GANGS and ' +
+                 'VECTOR_LENGTH environment variables or via {num_gangs} ' +
+                 'and {vector_length} in the executable command line')
+    parser.add_argument('--server', action='store_true',
+            help='keep the executable running between repetitions and ' +
+                 'request runs by writing "num_gangs vector_length ' +
+                 'repetitions" lines to its standard input')
+    parser.add_argument('--shared-library', action='store_true',
+            help='the executable is a shared library exporting ' +
+                 '"double run(int num_gangs, int vector_length)", which is ' +
+                 'called within the tuner to time the kernel')
+    parser.add_argument('--slots', type=int,
+            help='number of points to run concurrently, each in its own ' +
+                 'device slot (default: 1)',
+            metavar='count')
+    parser.add_argument('--slot-env', type=str, action='append',
+            help='environment variable assigning a run to its slot, such as ' +
+                 '"CUDA_VISIBLE_DEVICES={slot}" or "ACC_DEVICE_NUM={slot}"; ' +
+                 'may be given more than once',
+            metavar='NAME=value')
     parser.add_argument('-v', '--verbose', action='store_true',
             help='display progress and diagnostic information while tuning')
     parser.add_argument('-x', '--ignore-exit', action='store_true',
@@ -89,6 +178,72 @@ def main():
         print('--repetitions must be > 0', file=sys.stderr)
         sys.exit(1)
 
+    if args.budget is not None and args.budget <= 0:
+        print('--budget must be > 0', file=sys.stderr)
+        sys.exit(1)
+
+    if args.warmup is not None and args.warmup < 0:
+        print('--warmup must be >= 0', file=sys.stderr)
+        sys.exit(1)
+
+    if args.compile_jobs is not None and args.compile_jobs <= 0:
+        print('--compile-jobs must be > 0', file=sys.stderr)
+        sys.exit(1)
+
+    if args.slots is not None and args.slots <= 0:
+        print('--slots must be > 0', file=sys.stderr)
+        sys.exit(1)
+
+    for assignment in args.slot_env or []:
+        if '=' not in assignment or assignment.startswith('='):
+            print('--slot-env must have the form NAME=value', file=sys.stderr)
+            sys.exit(1)
+
+    if args.shared_library and args.slots is not None and args.slots > 1:
+        print('--shared-library cannot be used with more than one slot',
+                file=sys.stderr)
+        sys.exit(1)
+
+    if args.cache_size is not None and args.cache_size <= 0:
+        print('--cache-size must be > 0', file=sys.stderr)
+        sys.exit(1)
+
+    if args.runtime_params and args.compile_command and (
+            '{num_gangs}' in args.compile_command or
+            '{vector_length}' in args.compile_command):
+        print('--compile-command cannot contain {num_gangs} or '
+              '{vector_length} when --runtime-params is given',
+                file=sys.stderr)
+        sys.exit(1)
+
+    if args.server and (args.kernel_timing or args.all_matches):
+        print('--server cannot be used with --kernel-timing or '
+              '--all-matches', file=sys.stderr)
+        sys.exit(1)
+
+    if args.shared_library and (args.server or args.kernel_timing):
+        print('--shared-library cannot be used with --server or '
+              '--kernel-timing', file=sys.stderr)
+        sys.exit(1)
+
+    if args.resume and not args.store:
+        print('--resume requires --store', file=sys.stderr)
+        sys.exit(1)
+
+    if args.ci_width is not None and args.ci_width <= 0:
+        print('--ci-width must be > 0', file=sys.stderr)
+        sys.exit(1)
+
+    if (args.compile_timeout is not None and args.compile_timeout <= 0) or (
+            args.run_timeout is not None and args.run_timeout <= 0):
+        print('--compile-timeout and --run-timeout must be > 0',
+                file=sys.stderr)
+        sys.exit(1)
+
+    if args.timeout_factor is not None and args.timeout_factor <= 0:
+        print('--timeout-factor must be > 0', file=sys.stderr)
+        sys.exit(1)
+
     # Extract provided arguments into a dictionary for easy construction
     # of TuningOptions
     kwargs = dict( (k, args.__dict__[k]) for k in args.__dict__
@@ -0,0 +1,170 @@
+import logging
+import math
+import os
+import timeit
+from multiprocessing import Pool
+
+from .replay import ReplayCost, ReplayData
+from .result_writer import ResultFiles, ResultWriter
+from .tuner import RETESTING_METHODS, tune
+from .tuningoptions import TuningOptions
+
+LOGGER = logging.getLogger('tuner')
+
+# Columns of the table produced by run_benchmark
+COLUMNS = ['method', 'kernel', 'trial', 'points', 'tests', 'iterations',
+           'percentile', 'verdict', 'passed', 'cost', 'wall', 'seconds']
+
+# A result passes if it is not significantly different from the optimum in
+# the test data, or if it is within this percentile of the points
+PASS_PERCENTILE = 5
+
+def find_test_data(paths):
+    '''Returns the CSV files given in paths, or found (recursively) in the
+    directories given in paths, in sorted order'''
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for dirpath, dirnames, filenames in os.walk(path):
+                files.extend(os.path.join(dirpath, f) for f in filenames
+                             if f.lower().endswith('.csv'))
+        else:
+            files.append(path)
+    return sorted(files)
+
+def benchmark_one(method, csv_filename, options=None, trial=0):
+    '''Runs one search method on the test data in a CSV file
+
+    options is a dictionary of additional TuningOptions.  Returns a dictionary
+    with an entry for each of COLUMNS.  The best point found is judged by its
+    recorded time (which differs from the time the search saw if noise is
+    simulated with the noise_seed option).  The verdict is "same" if it is not
+    significantly different from the optimum in the test data, "differs" if it
+    is, and "unable" if the T-test cannot be performed.  points is the number
+    of different points tested, and tests the number of tests (a method may
+    test a point more than once).  cost is the simulated time to compile and
+    run every point tested, and wall is the simulated wall-clock time of the
+    search with opts.slots devices (see ReplayCost).
+    '''
+    kwargs = dict(options or {})
+    kwargs['source'] = csv_filename
+    kwargs['search_method'] = method
+    opts = TuningOptions(**kwargs)
+
+    # Load the data first, so invalid files raise ValueError here (tune exits)
+    data = ReplayData.load(csv_filename)
+
+    costs = ReplayCost(opts.compile_cost, method in RETESTING_METHODS)
+    start = timeit.default_timer()
+    with ResultWriter(ResultFiles(None, None, None)) as w:
+        res = tune(opts, w, costs)
+    seconds = timeit.default_timer() - start
+
+    best = data.result(res.optimal) or res.tests[res.optimal]
+    percentile = data.percentile(best.average)
+    try:
+        if data.best().is_signif_diff(best, opts.repetitions):
+            verdict = 'differs'
+        else:
+            verdict = 'same'
+    except (ValueError, ZeroDivisionError):
+        verdict = 'unable' # Standard deviation is 0
+    return {
+        'method': method,
+        'kernel': os.path.splitext(os.path.basename(csv_filename))[0],
+        'trial': trial,
+        'points': len(res.tests),
+        'tests': costs.tests,
+        'iterations': res.num_iterations,
+        'percentile': percentile,
+        'verdict': verdict,
+        'passed': verdict == 'same' or percentile <= PASS_PERCENTILE,
+        'cost': costs.total,
+        'wall': costs.wall_time(opts.slots),
+        'seconds': seconds,
+    }
+
+def _quiet():
+    # Worker processes would otherwise interleave the log of every search
+    LOGGER.setLevel(logging.CRITICAL)
+
+def _benchmark_task(args):
+    return benchmark_one(*args)
+
+def run_benchmark(methods, csv_filenames, options=None, jobs=None, trials=1,
+        noise=False):
+    '''Runs every search method on every CSV file, generating a row (see
+    benchmark_one) as each finishes
+
+    Each search is repeated trials times.  Trial t sets the seed option
+    (used by randomized search methods) to its initial value (or 0) plus t,
+    and if noise is True, sets noise_seed to the same value, so that the
+    times the search sees are simulated with different random noise in each
+    trial.
+
+    Searches run in a pool of jobs processes (by default, one per CPU), with
+    logging turned off.  If jobs is 1, they run in this process instead.
+    '''
+    options = dict(options or {})
+    base_seed = options.get('seed') or 0
+    tasks = []
+    for trial in range(trials):
+        trial_options = dict(options)
+        if trials > 1:
+            trial_options['seed'] = base_seed + trial
+        if noise:
+            trial_options['noise_seed'] = base_seed + trial
+        tasks.extend((method, f, trial_options, trial) for method in methods
+                     for f in csv_filenames)
+    if jobs == 1:
+        level = LOGGER.level
+        _quiet()
+        try:
+            for task in tasks:
+                yield _benchmark_task(task)
+        finally:
+            LOGGER.setLevel(level)
+        return
+
+    pool = Pool(jobs, _quiet)
+    try:
+        for row in pool.imap_unordered(_benchmark_task, tasks, 1):
+            yield row
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+
+def quantile(values, q):
+    '''Returns the q-quantile (0 <= q <= 1) of a list of numbers, using the
+    nearest-rank method'''
+    values = sorted(values)
+    rank = max(int(math.ceil(q * len(values))), 1)
+    return values[rank - 1]
+
+def summarize(rows):
+    '''Returns a list of tuples (method, runs, passed, average number of
+    tests, maximum number of tests, median percentile, 90th-quantile
+    percentile, worst percentile, average simulated wall-clock time, total
+    seconds), one per method, in sorted order
+
+    The percentile of a run is where the best point it found ranks among all
+    the points in the test data.  With several trials, the summary describes
+    the distribution of this percentile over all kernels and trials.
+    '''
+    by_method = {}
+    for row in rows:
+        by_method.setdefault(row['method'], []).append(row)
+    summary = []
+    for method in sorted(by_method):
+        rows = by_method[method]
+        tests = [row['tests'] for row in rows]
+        percentiles = [row['percentile'] for row in rows]
+        summary.append((method, len(rows),
+                        len([row for row in rows if row['passed']]),
+                        sum(tests) / float(len(tests)), max(tests),
+                        quantile(percentiles, 0.5),
+                        quantile(percentiles, 0.9), max(percentiles),
+                        sum(row['wall'] for row in rows) / len(rows),
+                        sum(row['seconds'] for row in rows)))
+    return summary
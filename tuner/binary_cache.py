@@ -0,0 +1,84 @@
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import threading
+
+LOGGER = logging.getLogger('tuner')
+
+class BinaryCache(object):
+    '''An on-disk cache of compiled executables, shared between sessions.
+
+    Entries are stored as files named by a hash of everything that determines
+    the output of the compile command.  Whenever the cache grows beyond
+    max_size bytes, the least recently used entries are removed.  Entries are
+    written to a temporary file and renamed into place, so several tuners can
+    share a cache directory.
+    '''
+
+    def __init__(self, directory, max_size):
+        self.directory = directory
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    @staticmethod
+    def key(*parts):
+        '''Returns the cache key for a sequence of strings'''
+        digest = hashlib.sha1()
+        for part in parts:
+            if not isinstance(part, bytes):
+                part = part.encode('utf8')
+            digest.update(part)
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def fetch(self, key, dest):
+        '''Copies the entry for key to dest.  Returns False on a cache miss.'''
+        entry = os.path.join(self.directory, key)
+        try:
+            shutil.copy2(entry, dest)
+            os.utime(entry, None) # Mark the entry as recently used
+        except (IOError, OSError):
+            return False
+        return True
+
+    def store(self, key, path):
+        '''Adds the file at path to the cache under key'''
+        try:
+            fd, tmp = tempfile.mkstemp(dir=self.directory, prefix='.tmp')
+            os.close(fd)
+            shutil.copy2(path, tmp)
+            os.utime(tmp, None)
+            os.rename(tmp, os.path.join(self.directory, key))
+        except (IOError, OSError) as e:
+            LOGGER.warning('Unable to add %s to the binary cache: %s', path, e)
+            return
+        with self.lock:
+            self._evict()
+
+    def _evict(self):
+        entries = []
+        total = 0
+        for name in os.listdir(self.directory):
+            if name.startswith('.'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue # Removed by another tuner
+            entries.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+
+        entries.sort()
+        for mtime, size, path in entries:
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
@@ -0,0 +1,233 @@
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import timeit
+from collections import namedtuple
+from multiprocessing.pool import ThreadPool
+
+from .binary_cache import BinaryCache
+from .utilities import (CommandTimedOut, call_command, kill_command,
+        point_prefix)
+
+LOGGER = logging.getLogger('tuner')
+
+'''Represents the outcome of compiling the program for a single point.
+
+output -- output produced by the compile command
+return_code -- exit code of the compile command
+executable -- command line that runs the executable built for this point
+timed_out -- True if the compile command was killed for taking too long
+elapsed -- seconds the compile command took, or None if the executable was
+           taken from the cache
+'''
+CompileResult = namedtuple('CompileResult',
+        ['output', 'return_code', 'executable', 'timed_out', 'elapsed'])
+
+def executable_path(command, directory):
+    '''Returns the path of the program a command line runs
+
+    Relative paths are resolved against directory (or the current directory if
+    it is None).  Returns None if the program is found on $PATH instead.
+    '''
+    parts = command.strip().split(None, 1)
+    if not parts or os.sep not in parts[0]:
+        return None
+    return os.path.join(directory or os.curdir, parts[0])
+
+def executable_in(command, directory):
+    '''Rewrites a command line so its program is run from directory
+
+    Only programs given as a relative path (e.g., ./a.out) are rewritten;
+    absolute paths and commands found on $PATH are returned unchanged.
+    '''
+    if directory is None:
+        return command
+    parts = command.strip().split(None, 1)
+    if not parts or os.path.isabs(parts[0]) or os.sep not in parts[0]:
+        return command
+    parts[0] = os.path.join(directory, parts[0])
+    return ' '.join(parts)
+
+class CompilePool(object):
+    '''Compiles the program for upcoming points on a pool of worker threads.
+
+    With a single job, each point is compiled in the current directory right
+    before it is run, which is how the tuner has always worked.  With more
+    than one job, or when points run concurrently in several device slots,
+    every point is compiled in its own build directory, so the compile command
+    must write its output to the current directory (the {source} placeholder
+    is replaced by an absolute path).  Runs are not affected: they happen in
+    the order the search method requests them.
+
+    If opts.runtime_params is set, the program reads its parameters when it
+    runs, so it is compiled only once, the first time any point is needed.
+
+    If opts.cache_dir is set, executables are also kept in a BinaryCache, and
+    a point whose source file, compile command and parameters are unchanged
+    since an earlier session is not compiled again.  If keep_executables is
+    True (for search methods that test the same points again), executables
+    are kept in a temporary BinaryCache for this session when opts.cache_dir
+    is not set.
+    '''
+
+    def __init__(self, opts, keep_executables=False):
+        self.opts = opts
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.compiling = set() # Handles of the compile commands running
+        self.closed = False
+        self.cache = None
+        self.cache_root = None # Temporary cache directory, removed on close
+        cache_dir = opts.cache_dir
+        if (cache_dir is None and keep_executables and
+                not opts.runtime_params):
+            self.cache_root = cache_dir = tempfile.mkdtemp(prefix='optacc-')
+        if cache_dir is not None:
+            if executable_path(opts.executable, None) is None:
+                LOGGER.warning('Not using the binary cache: the executable '
+                        '"%s" is not given as a path to a file',
+                        opts.executable)
+            else:
+                self.cache = BinaryCache(cache_dir,
+                        opts.cache_size * 1024 * 1024)
+                self.source_digest = ''
+                if opts.source is not None:
+                    with open(opts.source, 'rb') as f:
+                        self.source_digest = BinaryCache.key(f.read())
+        self.shared_build = None
+        # Held while the shared build compiles; separate from self.lock,
+        # which the compile itself needs to register its handle
+        self.shared_lock = threading.Lock()
+        if ((opts.compile_jobs > 1 or opts.slots > 1) and
+                not opts.runtime_params):
+            self.build_root = tempfile.mkdtemp(prefix='optacc-')
+            self.pool = ThreadPool(opts.compile_jobs)
+        else:
+            self.build_root = None
+            self.pool = None
+
+    def prefetch(self, points):
+        '''Starts compiling points in the background, if there are workers'''
+        if self.pool is None:
+            return
+        with self.lock:
+            for point in points:
+                if point not in self.pending:
+                    self.pending[point] = self.pool.apply_async(
+                            self._compile, (point,))
+
+    def compile(self, point):
+        '''Returns the CompileResult for a point, compiling it if necessary'''
+        if self.opts.runtime_params:
+            with self.shared_lock:
+                if self.shared_build is None:
+                    self.shared_build = self._compile(None)
+            return self.shared_build
+        if self.pool is None:
+            return self._compile(point)
+        self.prefetch([point])
+        return self.pending[point].get()
+
+    def release(self, point):
+        '''Discards the build for a point once it is no longer needed'''
+        if self.pool is None:
+            return
+        with self.lock:
+            self.pending.pop(point, None)
+        shutil.rmtree(self._build_dir(point), ignore_errors=True)
+
+    def close(self):
+        # Compiles started ahead of time may never be needed (e.g., if the
+        # search stops early or is interrupted), so don't wait for them
+        with self.lock:
+            self.closed = True
+            for handle in self.compiling:
+                kill_command(handle)
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            shutil.rmtree(self.build_root, ignore_errors=True)
+        if self.cache_root is not None:
+            shutil.rmtree(self.cache_root, ignore_errors=True)
+
+    def _build_dir(self, point):
+        if self.build_root is None or point is None:
+            return None
+        return os.path.join(self.build_root,
+                'g{0:.0f}_v{1:.0f}'.format(point[0], point[1]))
+
+    def _compile(self, point):
+        source = self.opts.source
+        directory = self._build_dir(point)
+        if directory is not None:
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            if source is not None:
+                source = os.path.abspath(source)
+
+        # When parameters are passed at run time, the program is compiled
+        # once for all points, so there are no parameters to substitute
+        if point is None:
+            params = {}
+            prefix = '[all points]'
+        else:
+            params = {
+                'num_gangs': int(point[0]),
+                'vector_length': int(point[1])
+            }
+            prefix = point_prefix(point)
+
+        command = self.opts.compile_command.format(source=source, **params)
+
+        # Set NUM_GANGS and VECTOR_LENGTH as environment variables so that
+        # Makefiles can make use of these parameters.
+        env = dict((k.upper(), str(v)) for k, v in params.items())
+
+        # Copy environment variables for this process.  This is necessary to
+        # preserve $PATH and other variables that might be necessary for
+        # compilation.
+        env.update(os.environ)
+
+        executable = executable_in(self.opts.executable, directory)
+        key = None
+        if self.cache is not None:
+            # The key uses the compile command as the user would see it, not
+            # the one rewritten for a build directory, so that entries can be
+            # shared regardless of the number of compile jobs
+            key = BinaryCache.key(self.source_digest,
+                    self.opts.compile_command.format(
+                        source=self.opts.source, **params),
+                    str(params.get('num_gangs', '')),
+                    str(params.get('vector_length', '')))
+            binary = executable_path(self.opts.executable, directory)
+            if self.cache.fetch(key, binary):
+                LOGGER.debug('%s Using cached executable', prefix)
+                return CompileResult('', 0, executable, False, None)
+
+        LOGGER.debug('%s Compiling: %s', prefix, command)
+
+        handles = []
+        def started(handle):
+            with self.lock:
+                if self.closed:
+                    kill_command(handle)
+                self.compiling.add(handle)
+                handles.append(handle)
+        start = timeit.default_timer()
+        try:
+            output, return_code = call_command(command, env=env,
+                    cwd=directory, timeout=self.opts.compile_timeout,
+                    started=started)
+        except CommandTimedOut as e:
+            return CompileResult(e.output, None, executable, True,
+                    timeit.default_timer() - start)
+        finally:
+            with self.lock:
+                for handle in handles:
+                    self.compiling.discard(handle)
+        elapsed = timeit.default_timer() - start
+        if key is not None and return_code == 0 and os.path.isfile(binary):
+            self.cache.store(key, binary)
+        return CompileResult(output, return_code, executable, False, elapsed)
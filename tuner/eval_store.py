@@ -0,0 +1,88 @@
+import hashlib
+import sqlite3
+import threading
+
+from .testresult import TestResult
+
+_SCHEMA = [
+    '''CREATE TABLE IF NOT EXISTS results (
+        session TEXT, num_gangs REAL, vector_length REAL,
+        average REAL, stdev REAL, error TEXT, repetitions INTEGER,
+        PRIMARY KEY (session, num_gangs, vector_length))''',
+    '''CREATE TABLE IF NOT EXISTS runs (
+        session TEXT, num_gangs REAL, vector_length REAL, time REAL)''',
+    '''CREATE INDEX IF NOT EXISTS runs_by_point
+        ON runs (session, num_gangs, vector_length)''',
+]
+
+class EvaluationStore(object):
+    '''Records the result and individual runs of every point in SQLite.
+
+    Results are grouped into sessions identified by a hash of everything that
+    affects the measurements (see session_key), so one database can hold
+    results for several programs.  Each point is committed as soon as it has
+    been tested, and the database uses write-ahead logging, so a tuning
+    session that dies loses at most the point it was testing.
+    '''
+
+    def __init__(self, filename, session):
+        self.session = session
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(filename, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        for statement in _SCHEMA:
+            self.conn.execute(statement)
+        self.conn.commit()
+
+    @staticmethod
+    def session_key(opts):
+        '''Returns the session key for tuning with the given TuningOptions'''
+        digest = hashlib.sha1()
+        if opts.source is not None:
+            with open(opts.source, 'rb') as f:
+                digest.update(f.read())
+        # The way times are taken matters as well as what is timed, since
+        # e.g. warm-up runs or a persistent process change the times
+        for part in [opts.compile_command, opts.executable,
+                     opts.time_regexp.pattern, str(opts.kernel_timing),
+                     str(opts.warmup), str(opts.all_matches),
+                     str(opts.server), str(opts.shared_library),
+                     str(opts.runtime_params)]:
+            digest.update(b'\0')
+            digest.update(part.encode('utf8'))
+        return digest.hexdigest()
+
+    def lookup(self, point, repetitions):
+        '''Returns (TestResult, [times]) for a point that was successfully
+        tested with at least the given number of repetitions, or None
+        '''
+        with self.lock:
+            row = self.conn.execute('SELECT average, stdev FROM results '
+                    'WHERE session = ? AND num_gangs = ? AND '
+                    'vector_length = ? AND error IS NULL AND repetitions >= ?',
+                    (self.session, point[0], point[1], repetitions)).fetchone()
+            if row is None:
+                return None
+            times = [t for (t,) in self.conn.execute('SELECT time FROM runs '
+                    'WHERE session = ? AND num_gangs = ? AND '
+                    'vector_length = ? ORDER BY rowid',
+                    (self.session, point[0], point[1]))]
+        return TestResult(point, row[0], row[1]), times
+
+    def add(self, result, repetitions, times):
+        '''Records the result of testing a point and the time of each run'''
+        point = result.point
+        with self.lock:
+            self.conn.execute('INSERT OR REPLACE INTO results VALUES '
+                    '(?, ?, ?, ?, ?, ?, ?)', (self.session, point[0],
+                    point[1], result.average, result.stdev, result.error,
+                    repetitions))
+            self.conn.execute('DELETE FROM runs WHERE session = ? AND '
+                    'num_gangs = ? AND vector_length = ?',
+                    (self.session, point[0], point[1]))
+            self.conn.executemany('INSERT INTO runs VALUES (?, ?, ?, ?)',
+                    [(self.session, point[0], point[1], t) for t in times])
+            self.conn.commit()
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,86 @@
+from ..point import Point
+from ..searchresult import SearchResult
+from .lattice import lattice_axes
+
+# Approximate number of values of each parameter on the coarse lattice
+COARSE_VALUES = 4
+
+# Number of best points whose surroundings are refined on each level
+REFINE_BEST = 2
+
+# Maximum number of times the finest level is repeated while the best point
+# keeps moving
+MAX_FINE_ITERATIONS = 10
+
+def _coarse_step(n):
+    '''Returns the largest power of 2 giving at least COARSE_VALUES values
+    out of n'''
+    step = 1
+    while (n - 1) // (step * 2) >= COARSE_VALUES - 1:
+        step *= 2
+    return step
+
+def _coarse_indices(n, step):
+    indices = list(range(0, n, step))
+    if indices[-1] != n - 1:
+        indices.append(n - 1) # Always include the end of the range
+    return indices
+
+def tune_adaptive_grid(objective, opts):
+    '''Optimizes an objective function with a coarse-to-fine grid search.
+
+    A coarse lattice spanning the search ranges is tested first.  Then, the
+    spacing of the lattice is halved, and the neighbors of the REFINE_BEST
+    best points tested so far are tested on the finer lattice.  Once the
+    lattice has reached its finest resolution (multiples of 32 for num_gangs
+    and powers of 2 for vector_length), the neighbors of the best points are
+    tested until the best point stops changing.  Every point is tested once,
+    and each level's points are tested together with objective.evaluate_many.
+    '''
+    gangs, vector_lengths = lattice_axes(opts)
+    def point(i, j):
+        return Point(gangs[i], vector_lengths[j])
+
+    times = {}
+    index = {} # Point => (i, j) lattice indices
+    def test(cells):
+        points = []
+        for i, j in cells:
+            pt = point(i, j)
+            if pt not in times and pt not in index:
+                index[pt] = (i, j)
+                points.append(pt)
+        for pt, result in objective.evaluate_many(points):
+            times[pt] = result
+
+    gstep = _coarse_step(len(gangs))
+    vstep = _coarse_step(len(vector_lengths))
+    test([(i, j) for i in _coarse_indices(len(gangs), gstep)
+                 for j in _coarse_indices(len(vector_lengths), vstep)])
+    iterations = 1
+
+    fine_iterations = 0
+    while fine_iterations < MAX_FINE_ITERATIONS:
+        if gstep == 1 and vstep == 1:
+            fine_iterations += 1
+        gstep = max(gstep // 2, 1)
+        vstep = max(vstep // 2, 1)
+
+        best = sorted(times, key=lambda x: times[x])[:REFINE_BEST]
+        cells = []
+        for pt in best:
+            i, j = index[pt]
+            for di in (-gstep, 0, gstep):
+                for dj in (-vstep, 0, vstep):
+                    if (0 <= i + di < len(gangs) and
+                            0 <= j + dj < len(vector_lengths)):
+                        cells.append((i + di, j + dj))
+
+        tested = len(times)
+        test(cells)
+        iterations += 1
+        if fine_iterations > 0 and len(times) == tested:
+            break # The best points' neighbors have all been tested
+
+    best = sorted(times, key=lambda x: times[x])[0]
+    return SearchResult(best, times, iterations)
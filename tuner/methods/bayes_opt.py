@@ -0,0 +1,232 @@
+import math
+from ..point import Point
+from ..searchresult import SearchResult
+from .lattice import DEFAULT_BUDGET, lattice_axes, lattice_points
+
+try:
+    from math import erf
+except ImportError:
+    # Python 2.6: Abramowitz and Stegun 7.1.26 (error below 1.5e-7)
+    def erf(x):
+        t = 1.0 / (1.0 + 0.3275911 * abs(x))
+        y = 1.0 - t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 +
+                t * (-1.453152027 + t * 1.061405429)))) * math.exp(-x * x)
+        return y if x >= 0 else -y
+
+DEFAULT_INITIAL_POINT = Point(256, 128)
+
+# Number of points tested before the model is used to choose points
+INITIAL_POINTS = 6
+
+# The search stops early once the largest expected improvement is less than
+# this fraction of the standard deviation of the (log) times measured
+MIN_EXPECTED_IMPROVEMENT = 1e-3
+
+# Length scales (for log2 of each parameter, scaled to [0, 1]) tried when
+# fitting the model; the ones maximizing the marginal likelihood are used
+LENGTH_SCALES = [0.1, 0.2, 0.4, 0.8, 1.6]
+
+# Times are clamped to this before taking their logarithm
+MIN_TIME = 1e-9
+
+# Variance added to the diagonal of the covariance matrix, to model noise not
+# captured by the standard deviations and keep the matrix well conditioned
+NUGGET = 1e-3
+
+def _matern52(a, b, scales):
+    '''Matern 5/2 covariance between two points'''
+    r = math.sqrt(sum(((x - y) / s)**2 for x, y, s in zip(a, b, scales)))
+    r5 = math.sqrt(5) * r
+    return (1 + r5 + r5 * r5 / 3.0) * math.exp(-r5)
+
+def _cholesky(a):
+    '''Returns the lower triangular Cholesky factor of a matrix (a list of
+    rows), or raises ValueError if it is not positive definite'''
+    n = len(a)
+    l = [[0.0] * n for i in range(n)]
+    for i in range(n):
+        for j in range(i + 1):
+            s = a[i][j] - sum(l[i][k] * l[j][k] for k in range(j))
+            if i == j:
+                if s <= 0:
+                    raise ValueError('Matrix is not positive definite')
+                l[i][i] = math.sqrt(s)
+            else:
+                l[i][j] = s / l[j][j]
+    return l
+
+def _solve_lower(l, b):
+    '''Solves l x = b for x, where l is lower triangular'''
+    x = []
+    for i in range(len(b)):
+        x.append((b[i] - sum(l[i][k] * x[k] for k in range(i))) / l[i][i])
+    return x
+
+def _solve_upper(l, b):
+    '''Solves transpose(l) x = b for x, where l is lower triangular'''
+    n = len(b)
+    x = [0.0] * n
+    for i in reversed(range(n)):
+        x[i] = (b[i] - sum(l[k][i] * x[k] for k in range(i + 1, n))) / l[i][i]
+    return x
+
+class GaussianProcess(object):
+    '''Gaussian process regression with a Matern 5/2 covariance function.
+
+    xs is a list of coordinate tuples, ys the observed values and noise the
+    variance of the noise in each observation.  Observations are standardized,
+    and the length scales are chosen from LENGTH_SCALES to maximize the
+    marginal likelihood unless they are given.
+    '''
+
+    def __init__(self, xs, ys, noise, scales=None):
+        self.xs = list(xs)
+        self.mean = sum(ys) / float(len(ys))
+        self.scale = math.sqrt(sum((y - self.mean)**2 for y in ys) /
+                               float(len(ys))) or 1.0
+        self.ys = [(y - self.mean) / self.scale for y in ys]
+        self.noise = [v / self.scale**2 + NUGGET for v in noise]
+
+        if scales is None:
+            best = None
+            for s0 in LENGTH_SCALES:
+                for s1 in LENGTH_SCALES:
+                    try:
+                        likelihood = self._fit((s0, s1))
+                    except ValueError:
+                        continue
+                    if best is None or likelihood > best[0]:
+                        best = (likelihood, (s0, s1))
+            if best is None:
+                raise ValueError('Unable to fit the model')
+            scales = best[1]
+        self._fit(scales)
+
+    def _fit(self, scales):
+        '''Factors the covariance matrix for the given length scales and
+        returns the log marginal likelihood'''
+        n = len(self.xs)
+        k = [[_matern52(self.xs[i], self.xs[j], scales) for j in range(n)]
+             for i in range(n)]
+        for i in range(n):
+            k[i][i] += self.noise[i]
+        self.scales = scales
+        self.l = _cholesky(k)
+        self.alpha = _solve_upper(self.l, _solve_lower(self.l, self.ys))
+        return (-0.5 * sum(y * a for y, a in zip(self.ys, self.alpha)) -
+                sum(math.log(self.l[i][i]) for i in range(n)))
+
+    def predict(self, x):
+        '''Returns the mean and standard deviation of the prediction at x'''
+        k = [_matern52(x, xi, self.scales) for xi in self.xs]
+        mean = sum(ki * a for ki, a in zip(k, self.alpha))
+        v = _solve_lower(self.l, k)
+        var = max(1.0 - sum(vi * vi for vi in v), 0.0)
+        return self.mean + mean * self.scale, math.sqrt(var) * self.scale
+
+def expected_improvement(mean, stdev, best):
+    '''Returns the expected improvement over best (for minimization) of a
+    prediction with the given mean and standard deviation'''
+    if stdev <= 0:
+        return max(best - mean, 0.0)
+    z = (best - mean) / stdev
+    cdf = 0.5 * (1 + erf(z / math.sqrt(2)))
+    pdf = math.exp(-0.5 * z * z) / math.sqrt(2 * math.pi)
+    return (best - mean) * cdf + stdev * pdf
+
+def tune_bayes_opt(objective, opts):
+    '''Optimizes an objective function using Bayesian optimization.
+
+    A Gaussian process modeling the logarithm of the time is fitted to every
+    point tested so far, taking the standard deviation of each point into
+    account, and the point on the lattice with the greatest expected
+    improvement is tested next.  Points are chosen in batches of opts.slots,
+    so they can run concurrently: after choosing a point, the model is updated
+    as if the point's time were the model's prediction ("kriging believer"),
+    and the next point in the batch is chosen using the updated model.
+
+    At most opts.budget points are tested (DEFAULT_BUDGET if it is not set).
+    Points that fail are modeled as twice as slow as the slowest point that
+    succeeded.
+    '''
+    budget = opts.budget or DEFAULT_BUDGET
+    batch_size = max(opts.slots, 1)
+    candidates = lattice_points(opts)
+    budget = min(budget, len(candidates))
+
+    # Coordinates for the model: log2 of each parameter, scaled to [0, 1]
+    gangs, vector_lengths = lattice_axes(opts)
+    lows = (math.log(gangs[0], 2), math.log(vector_lengths[0], 2))
+    spans = (math.log(gangs[-1], 2) - lows[0] or 1.0,
+             math.log(vector_lengths[-1], 2) - lows[1] or 1.0)
+    def coords(pt):
+        return tuple((math.log(pt[i], 2) - lows[i]) / spans[i]
+                     for i in range(2))
+
+    times = {}
+    iterations = 0
+    def test(points):
+        for pt, result in objective.evaluate_many(points):
+            times[pt] = result
+
+    # Start with points spread out over the lattice: the default initial
+    # point of the other methods (or the lattice point nearest to it), then
+    # repeatedly the point farthest from those chosen already
+    start = coords(DEFAULT_INITIAL_POINT)
+    initial = [min(candidates, key=lambda pt: _distance(coords(pt), start))]
+    while len(initial) < min(INITIAL_POINTS, budget):
+        initial.append(max(candidates, key=lambda pt: min(
+                _distance(coords(pt), coords(x)) for x in initial)))
+    test(initial)
+    iterations += 1
+
+    while len(times) < budget:
+        ok = [pt for pt in times if not times[pt].has_error]
+        if not ok:
+            break # Nothing to model; the program probably doesn't work
+        logs = dict((pt, math.log(max(times[pt].average, MIN_TIME)))
+                    for pt in ok)
+        failed = math.log(2) + max(logs.values())
+        xs, ys, noise = [], [], []
+        for pt in times:
+            xs.append(coords(pt))
+            if pt in logs:
+                ys.append(logs[pt])
+                # Variance of the log of the average time
+                noise.append((times[pt].stdev /
+                              max(times[pt].average, MIN_TIME))**2 /
+                             opts.repetitions)
+            else:
+                ys.append(failed)
+                noise.append(0.0)
+        model = GaussianProcess(xs, ys, noise)
+        best = min(logs.values())
+
+        batch = []
+        remaining = [pt for pt in candidates if pt not in times]
+        while remaining and len(batch) < min(batch_size, budget - len(times)):
+            scores = []
+            for pt in remaining:
+                mean, stdev = model.predict(coords(pt))
+                scores.append((expected_improvement(mean, stdev, best), pt))
+            ei, pt = max(scores, key=lambda score: score[0])
+            if ei < MIN_EXPECTED_IMPROVEMENT * model.scale:
+                break
+            batch.append(pt)
+            remaining.remove(pt)
+            if len(batch) < batch_size:
+                ys.append(model.predict(coords(pt))[0])
+                xs.append(coords(pt))
+                noise.append(0.0)
+                model = GaussianProcess(xs, ys, noise, model.scales)
+
+        if not batch:
+            break # The model does not expect any point to be an improvement
+        test(batch)
+        iterations += 1
+
+    best = sorted(times, key=lambda x: times[x])[0]
+    return SearchResult(best, times, iterations)
+
+def _distance(a, b):
+    return math.sqrt(sum((x - y)**2 for x, y in zip(a, b)))
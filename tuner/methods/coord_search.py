@@ -28,8 +28,13 @@ def _round(x):
     vector_length = 2**round(math.log(x[1], 2)) if x[1] > 0 else 1
     return Point(num_gangs, vector_length)
 
-def tune_coord_search(objective, opts, maxiter=100):
-    '''Optimizes an objective function using a coordinate search algorithm.'''
+def tune_coord_search(objective, opts, maxiter=100, complete_poll=False):
+    '''Optimizes an objective function using a coordinate search algorithm.
+
+    If complete_poll is True, every poll point is tested (concurrently, if
+    there are several device slots) before moving to the best one that
+    improves on the current point.
+    '''
 
     pt = DEFAULT_INITIAL_POINT
     sz = DEFAULT_INITIAL_STEP_SIZE
@@ -54,20 +59,32 @@ def tune_coord_search(objective, opts, maxiter=100):
         # As soon as polling finds a better point, the current point is moved
         # and the process repeats.  If polling is unsuccessful, the distance
         # is decreased, and new points closer to the current point are polled
-        # on the next iteration.
+        # on the next iteration.  (When points are tested concurrently, "as
+        # soon as" means the first improvement to finish, and the points
+        # still running at the time are recorded as well.)  With a complete
+        # poll, all four points are tested and the best one is chosen.
         iters += 1
-        for poll in [ _round(pt + sz*vec) for vec in BASIS ]:
-            if poll not in times:
-                result = objective(poll)
-                times[poll] = result
-                if result < times[pt]:
-                    pt = poll
-                    poll_successful = True
-                    consecutive_unsucc_iters = 0
+        polls = [ _round(pt + sz*vec) for vec in BASIS ]
+        polls = [ poll for i, poll in enumerate(polls)
+                  if poll not in times and poll not in polls[:i] ]
+        best = pt
+        tested = objective.evaluate_many(polls, results=times)
+        for poll, result in tested:
+            if result < times[best]:
+                best = poll
+                if not complete_poll:
                     break
+        tested.close() # Waits for the points still running
+        if best != pt:
+            pt = best
+            poll_successful = True
+            consecutive_unsucc_iters = 0
         else:
             consecutive_unsucc_iters += 1
             sz = int(sz * SHRINK)
 
     best = sorted(times, key=lambda x: times[x])[0]
     return SearchResult(best, times, iters)
+
+def tune_coord_search_parallel(objective, opts):
+    return tune_coord_search(objective, opts, complete_poll=True)
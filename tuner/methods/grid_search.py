@@ -8,15 +8,16 @@ def _grid_search(objective, points):
 
     Arguments:
     objective -- the objective function to optimize.  Receives a Point as input
-                 and returns a SearchResult.
+                 and returns a SearchResult.  All of the points are tested
+                 with objective.evaluate_many(points), since they are
+                 independent.
     points -- a generator producing Points at which to evaluate the function.
     '''
 
     times = {}
     iterations = 0
-    for pt in points:
+    for pt, result in objective.evaluate_many(points):
         iterations += 1
-        result = objective(pt)
         times[pt] = result
 
     best = sorted(times, key=lambda x: times[x])[0]
@@ -34,19 +35,22 @@ def tune_grid_pow2(objective, opts):
                 yield Point(1 << gang_pow2, 1 << vec_pow2)
     return _grid_search(objective, generator())
 
+def grid_points(opts, mul):
+    '''Generates every point whose coordinates are multiples of mul within
+    the gang/vector ranges'''
+    gmin = int(math.ceil(opts.num_gangs_min / float(mul)))
+    gmax = int(opts.num_gangs_max / mul)
+    vmin = int(math.ceil(opts.vector_length_min / float(mul)))
+    vmax = int(opts.vector_length_max / mul)
+    for gang_mult in range(gmin, gmax+1): # +1 since range is exclusive
+        for vec_mult in range(vmin, vmax+1):
+            num_gangs = max(mul * gang_mult, 1)    # max(_, 1) ensures
+            vector_length = max(mul * vec_mult, 1) # these are nonzero
+            yield Point(num_gangs, vector_length)
+
 def _tune_grid(objective, opts, mul):
     # Exhaustive search: search multiples of mul within gang/vector ranges
-    def generator():
-        gmin = int(math.ceil(opts.num_gangs_min / float(mul)))
-        gmax = int(opts.num_gangs_max / mul)
-        vmin = int(math.ceil(opts.vector_length_min / float(mul)))
-        vmax = int(opts.vector_length_max / mul)
-        for gang_mult in range(gmin, gmax+1): # +1 since range is exclusive
-            for vec_mult in range(vmin, vmax+1):
-                num_gangs = max(mul * gang_mult, 1)    # max(_, 1) ensures
-                vector_length = max(mul * vec_mult, 1) # these are nonzero
-                yield Point(num_gangs, vector_length)
-    return _grid_search(objective, generator())
+    return _grid_search(objective, grid_points(opts, mul))
 
 def tune_grid_32(objective, opts):
     return _tune_grid(objective, opts, 32)
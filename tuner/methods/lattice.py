@@ -0,0 +1,37 @@
+import math
+from ..point import Point
+
+# Spacing of num_gangs values on the lattice searched by the model-based and
+# sampling methods; vector_length values are powers of 2.  This is the same
+# rounding used by the direct search methods.
+GANG_STEP = 32
+
+# Number of points tested by methods that choose points from a budget, if
+# opts.budget is not set
+DEFAULT_BUDGET = 30
+
+def lattice_axes(opts):
+    '''Returns the lists of num_gangs and vector_length values on the lattice
+    within the ranges given in opts
+
+    num_gangs values are multiples of GANG_STEP and vector_length values are
+    powers of 2.  If a range contains no such value, its minimum is used.
+    '''
+    gmin = int(math.ceil(opts.num_gangs_min / float(GANG_STEP)))
+    gmax = int(opts.num_gangs_max / GANG_STEP)
+    gangs = [GANG_STEP * g for g in range(max(gmin, 1), gmax+1)]
+    if not gangs:
+        gangs = [opts.num_gangs_min]
+
+    vmin = int(math.ceil(math.log(opts.vector_length_min, 2)))
+    vmax = int(math.floor(math.log(opts.vector_length_max, 2)))
+    vector_lengths = [1 << v for v in range(vmin, vmax+1)]
+    if not vector_lengths:
+        vector_lengths = [opts.vector_length_min]
+
+    return gangs, vector_lengths
+
+def lattice_points(opts):
+    '''Returns a list of every Point on the lattice'''
+    gangs, vector_lengths = lattice_axes(opts)
+    return [Point(g, v) for g in gangs for v in vector_lengths]
@@ -1,16 +1,163 @@
 from __future__ import print_function
 import math
+import threading
+from multiprocessing.pool import ThreadPool
 from ..point import Point
 from ..searchresult import SearchResult
+from .lattice import lattice_axes
 
 DEFAULT_INITIAL_POINT = Point(256, 128)
 
-def nelder_mead(objective, initial, neighbors, roundfn, maxiter=100):
+# Fractions of the lattice axes (see lattice_axes) at which the additional
+# searches of the multi-start method begin
+MULTI_START_FRACTIONS = [(0.25, 0.25), (0.25, 0.75), (0.75, 0.25), (0.75, 0.75)]
+
+class EvaluationCache(object):
+    '''Memoizes an objective function, recording the result of every point.
+
+    The cache may be shared by several searches running in different threads.
+    A point requested by several searches at once is only tested once: the
+    others wait for its result.
+    '''
+
+    def __init__(self, objective):
+        self.objective = objective
+        self.results = {}
+        self.testing = {} # Point => threading.Event set once it is tested
+        self.lock = threading.Lock()
+
+    def get(self, point):
+        '''Returns the TestResult for a point, testing it if necessary'''
+        self.get_many([point])
+        return self.results[point]
+
+    def get_many(self, points):
+        '''Tests every point not tested yet, concurrently where possible'''
+        mine, others = [], []
+        with self.lock:
+            for point in points:
+                if point in self.results or point in mine:
+                    continue
+                if point in self.testing:
+                    others.append(self.testing[point])
+                else:
+                    self.testing[point] = threading.Event()
+                    mine.append(point)
+        try:
+            if len(mine) == 1:
+                self._done(mine[0], self.objective(mine[0]))
+            elif mine:
+                for point, result in self.objective.evaluate_many(mine):
+                    self._done(point, result)
+        finally:
+            # If testing failed, let waiting searches try again
+            with self.lock:
+                for point in mine:
+                    self.testing.pop(point).set()
+        for event in others:
+            event.wait()
+        for point in points:
+            if point not in self.results:
+                self.get(point) # The search testing it failed
+
+    def _done(self, point, result):
+        with self.lock:
+            self.results[point] = result
+
+class LockstepCache(EvaluationCache):
+    '''An EvaluationCache shared by a fixed number of searches, each running
+    in its own thread, which take turns in rounds.
+
+    A search requesting points that have not been tested waits until every
+    other search still running is waiting too (or has finished).  Then the
+    points requested in the round are tested together, in the order of the
+    searches, so the points tested and the batches they are tested in do not
+    depend on how the threads are scheduled.  Search i uses view(i) as its
+    cache, and must call finish(i) when it stops.
+    '''
+
+    def __init__(self, objective, searches):
+        EvaluationCache.__init__(self, objective)
+        self.running = searches
+        self.requests = {} # Search => points requested in this round
+        self.rounds = 0
+        self.error = None
+        self.cond = threading.Condition(self.lock)
+
+    def view(self, search):
+        return _LockstepView(self, search)
+
+    def request(self, search, points):
+        '''Returns once every point requested by a search has been tested'''
+        with self.cond:
+            if self.error is None and \
+                    all(point in self.results for point in points):
+                return
+            self.requests[search] = points
+            current = self.rounds
+            self._next_round()
+            while self.rounds == current and self.error is None:
+                self.cond.wait()
+            if self.error is not None:
+                raise self.error
+
+    def finish(self, search):
+        with self.cond:
+            self.running -= 1
+            self.requests.pop(search, None)
+            self._next_round()
+
+    def _next_round(self):
+        # Called with the lock held; tests the points of the round once every
+        # search that is still running has made its request
+        if not self.requests or len(self.requests) < self.running:
+            return
+        points = []
+        for search in sorted(self.requests):
+            for point in self.requests[search]:
+                if point not in self.results and point not in points:
+                    points.append(point)
+        self.requests = {}
+        try:
+            if len(points) == 1:
+                self.results[points[0]] = self.objective(points[0])
+            elif points:
+                for point, result in self.objective.evaluate_many(points):
+                    self.results[point] = result
+        except BaseException as e:
+            self.error = e # Stop the other searches too
+            raise
+        finally:
+            self.rounds += 1
+            self.cond.notify_all()
+
+class _LockstepView(object):
+    '''The cache used by one of the searches sharing a LockstepCache'''
+
+    def __init__(self, cache, search):
+        self.cache = cache
+        self.search = search
+
+    @property
+    def results(self):
+        return self.cache.results
+
+    def get(self, point):
+        self.get_many([point])
+        return self.cache.results[point]
+
+    def get_many(self, points):
+        self.cache.request(self.search, list(points))
+
+def nelder_mead(objective, initial, neighbors, roundfn, maxiter=100,
+        speculative=False, cache=None):
     '''Optimizes the objective function using a modified Nelder-Mead algorithm.
 
     Arguments:
     objective -- The objective function to optimize.  Receives a Point as input
-                 and returns a SearchResult.
+                 and returns a SearchResult.  The points of the initial
+                 simplex are tested together with
+                 objective.evaluate_many(points).
     initial -- A Point representing the initial point to test.
     neighbors -- A function that accepts a Point and returns an iterable of
                  Points neighboring the input.
@@ -19,18 +166,28 @@ def nelder_mead(objective, initial, neighbors, roundfn, maxiter=100):
                objective function.
     maxiter -- The maximum number of iterations of the algorithm to run before
                aborting and returning the result.  Default 100.
+    speculative -- If True, the reflection, expansion and both contraction
+                   points are tested together at the start of each iteration,
+                   so they can run concurrently, and new points in the
+                   simplex are tested together after a shrink step.  The
+                   search takes the same steps as when speculative is False,
+                   but tests some points it does not need.
+    cache -- An EvaluationCache (or a view of a LockstepCache) to share with
+             other searches, or None.
     '''
 
     # Wrap the objective function in a memoized function.  This serves two
     # purposes: to prevent calling the objective function on the same point
     # multiple times, and to keep a record of every point tested to include in
     # the results.
-    eval_cache = {}
+    if cache is None:
+        cache = EvaluationCache(objective)
     def f(point):
-        if point not in eval_cache:
-            eval_cache[point] = objective(point)
+        return cache.get(point).average
 
-        return eval_cache[point].average
+    def f_many(points):
+        '''Tests several points together, so f can look them up later'''
+        cache.get_many(points)
 
     N = len(initial)
     RHO = 1
@@ -40,9 +197,20 @@ def nelder_mead(objective, initial, neighbors, roundfn, maxiter=100):
 
     # Generate initial simplex
     simplex = [initial] + neighbors(initial)[:N]
+    f_many(simplex)
 
     visited = set()
 
+    def contract(xc, avoid, seen):
+        '''Replaces a contraction point that rounds to the same point as
+        avoid with a neighbor of the best point that has not been seen.'''
+        if xc == avoid:
+            for point in neighbors(simplex[0]):
+                if point not in seen:
+                    xc = point
+                    break
+        return xc
+
     def shrink():
         '''Performs the shrink step from the Nelder-Mead algorithm.'''
         for i in range(1, N + 1):
@@ -72,6 +240,8 @@ def nelder_mead(objective, initial, neighbors, roundfn, maxiter=100):
             break
 
         # Step 1: Order simplex by objective value
+        if speculative:
+            f_many(simplex) # New points after a shrink step
         simplex = list(sorted(simplex, key=f))
 
         # Compute the centroid of the best N points of the simplex
@@ -80,6 +250,17 @@ def nelder_mead(objective, initial, neighbors, roundfn, maxiter=100):
         # Step 2: Compute the reflection point xr
         xr = xbar + RHO*(xbar - simplex[-1])
         xr = roundfn(xr)
+
+        if speculative:
+            # Test every point this iteration might need at once.  The
+            # contraction points are computed as they would be below, where
+            # only xr has been added to visited.
+            seen = visited | set([xr])
+            f_many([xr, roundfn(xbar + CHI*(xr - xbar)),
+                    contract(roundfn(xbar + GAMMA*(xr - xbar)), xr, seen),
+                    contract(roundfn(xbar - GAMMA*(xbar - simplex[-1])),
+                             simplex[-1], seen)])
+
         visited.add(xr)
 
         if f(simplex[0]) <= f(xr) < f(simplex[-2]):
@@ -102,12 +283,7 @@ def nelder_mead(objective, initial, neighbors, roundfn, maxiter=100):
             if f(xr) < f(simplex[-1]):
                 # Outside contraction
                 xc = xbar + GAMMA*(xr - xbar)
-                xc = roundfn(xc)
-                if xc == xr:
-                    for point in neighbors(simplex[0]):
-                        if point not in visited:
-                            xc = point
-                            break
+                xc = contract(roundfn(xc), xr, visited)
 
                 visited.add(xc)
                 if f(xc) <= f(xr):
@@ -118,12 +294,7 @@ def nelder_mead(objective, initial, neighbors, roundfn, maxiter=100):
             else:
                 # Inside contraction
                 xc = xbar - GAMMA*(xbar - simplex[-1])
-                xc = roundfn(xc)
-                if xc == simplex[-1]:
-                    for point in neighbors(simplex[0]):
-                        if point not in visited:
-                            xc = point
-                            break
+                xc = contract(roundfn(xc), simplex[-1], visited)
 
                 visited.add(xc)
                 if f(xc) < f(simplex[-1]):
@@ -133,7 +304,7 @@ def nelder_mead(objective, initial, neighbors, roundfn, maxiter=100):
                     shrink()
 
         iterations += 1
-    return SearchResult(simplex[0], eval_cache, iterations)
+    return SearchResult(simplex[0], cache.results, iterations)
 
 def round_acc(x):
     num_gangs = round(x[0] / 32.0) * 32.0
@@ -152,3 +323,54 @@ def neighbors_acc(x):
 
 def tune(objective, opts):
     return nelder_mead(objective, DEFAULT_INITIAL_POINT, neighbors_acc, round_acc)
+
+def tune_speculative(objective, opts):
+    return nelder_mead(objective, DEFAULT_INITIAL_POINT, neighbors_acc, round_acc,
+                       speculative=True)
+
+def multi_start_points(opts):
+    '''Returns DEFAULT_INITIAL_POINT followed by lattice points spread out
+    over the search ranges (see MULTI_START_FRACTIONS)
+
+    The points are taken at fractions of the positions on each lattice axis,
+    so they are always within the ranges, and spread evenly over the
+    multiples of 32 for num_gangs and the powers of 2 for vector_length.
+    '''
+    gangs, vector_lengths = lattice_axes(opts)
+    def at(values, fraction):
+        return values[int(round(fraction * (len(values) - 1)))]
+    points = [DEFAULT_INITIAL_POINT]
+    for gf, vf in MULTI_START_FRACTIONS:
+        point = Point(at(gangs, gf), at(vector_lengths, vf))
+        if point not in points:
+            points.append(point)
+    return points
+
+def tune_multi_start(objective, opts):
+    '''Runs a Nelder-Mead search from each of multi_start_points(opts), all
+    sharing one cache of results.  With more than one device slot, the
+    searches run concurrently, in rounds (see LockstepCache).'''
+    starts = multi_start_points(opts)
+    if opts.slots > 1:
+        cache = LockstepCache(objective, len(starts))
+        def search(i):
+            try:
+                return nelder_mead(objective, starts[i], neighbors_acc,
+                                   round_acc, cache=cache.view(i))
+            finally:
+                cache.finish(i)
+        pool = ThreadPool(len(starts))
+        try:
+            results = pool.map(search, range(len(starts)), 1)
+        finally:
+            pool.terminate()
+            pool.join()
+    else:
+        cache = EvaluationCache(objective)
+        results = [nelder_mead(objective, initial, neighbors_acc, round_acc,
+                               cache=cache)
+                   for initial in starts]
+
+    best = min((res.optimal for res in results), key=lambda x: cache.results[x])
+    return SearchResult(best, cache.results,
+                        sum(res.num_iterations for res in results))
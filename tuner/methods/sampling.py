@@ -0,0 +1,88 @@
+import random
+from ..point import Point
+from ..searchresult import SearchResult
+from .lattice import DEFAULT_BUDGET, lattice_axes
+
+# Number of bits in the integers from which Sobol points are computed
+SOBOL_BITS = 30
+
+# Number of Latin hypercube designs drawn while looking for enough distinct
+# lattice points
+MAX_DESIGNS = 100
+
+def sobol_points(rng):
+    '''Generates an endless sequence of points in [0, 1) x [0, 1) from the
+    two-dimensional Sobol sequence, scrambled with a random digital shift'''
+    # Direction numbers: the first dimension is the van der Corput sequence,
+    # and the second uses the primitive polynomial x + 1
+    v1 = [1 << (SOBOL_BITS - 1 - k) for k in range(SOBOL_BITS)]
+    v2 = [v1[0]]
+    for k in range(1, SOBOL_BITS):
+        v2.append(v2[-1] ^ (v2[-1] >> 1))
+    x1 = rng.getrandbits(SOBOL_BITS)
+    x2 = rng.getrandbits(SOBOL_BITS)
+    scale = float(1 << SOBOL_BITS)
+    n = 0
+    while True:
+        yield x1 / scale, x2 / scale
+        # Gray code order: flip the direction number of the lowest zero bit
+        c = 0
+        while n & (1 << c):
+            c += 1
+        x1 ^= v1[c]
+        x2 ^= v2[c]
+        n += 1
+
+def latin_hypercube_points(rng, size):
+    '''Returns size points in [0, 1) x [0, 1), with exactly one point in each
+    of size equal intervals of each coordinate'''
+    columns = []
+    for dim in range(2):
+        strata = list(range(size))
+        rng.shuffle(strata)
+        columns.append([(s + rng.random()) / size for s in strata])
+    return list(zip(*columns))
+
+def _sample(objective, opts, draw):
+    '''Tests up to opts.budget distinct lattice points, snapping each unit
+    square point produced by draw(count) to the nearest lattice point'''
+    gangs, vector_lengths = lattice_axes(opts)
+    budget = min(opts.budget or DEFAULT_BUDGET,
+                 len(gangs) * len(vector_lengths))
+
+    # Points are spread uniformly over the lattice, i.e., linearly in
+    # num_gangs and logarithmically in vector_length
+    points = []
+    for u, v in draw(budget):
+        pt = Point(gangs[min(int(u * len(gangs)), len(gangs) - 1)],
+                   vector_lengths[min(int(v * len(vector_lengths)),
+                                      len(vector_lengths) - 1)])
+        if pt not in points:
+            points.append(pt)
+            if len(points) == budget:
+                break
+
+    times = {}
+    for pt, result in objective.evaluate_many(points):
+        times[pt] = result
+
+    best = sorted(times, key=lambda x: times[x])[0]
+    return SearchResult(best, times, 1)
+
+def tune_sobol(objective, opts):
+    '''Tests opts.budget points from a scrambled Sobol sequence'''
+    rng = random.Random(opts.seed)
+    def draw(count):
+        return sobol_points(rng)
+    return _sample(objective, opts, draw)
+
+def tune_latin_hypercube(objective, opts):
+    '''Tests opts.budget points from Latin hypercube designs'''
+    rng = random.Random(opts.seed)
+    def draw(count):
+        # Points of a design may snap to the same lattice point, so keep
+        # drawing designs until there are enough distinct ones
+        for i in range(MAX_DESIGNS):
+            for point in latin_hypercube_points(rng, count):
+                yield point
+    return _sample(objective, opts, draw)
@@ -0,0 +1,52 @@
+import math
+from ..searchresult import SearchResult
+from .grid_search import grid_points
+
+# After each round, the best 1/ETA of the points are kept, and they are
+# measured again with ETA times as many repetitions
+ETA = 3
+
+def successive_halving(objective, points, repetitions):
+    '''Optimizes an objective function by successive halving.
+
+    Every point is first tested with a single repetition.  After each round,
+    only the best 1/ETA of the points are kept and tested again with ETA times
+    as many repetitions (up to the given number of repetitions), until a
+    single point remains.  That point is always measured with the full number
+    of repetitions.
+
+    Arguments:
+    objective -- the objective function to optimize.  Each round is tested
+                 with objective.evaluate_many(points, repetitions=n).
+    points -- an iterable of Points to choose from.
+    repetitions -- the number of repetitions used to measure the winner.
+
+    The results in the SearchResult are those of the last round each point
+    took part in.
+    '''
+    times = {}
+    survivors = list(points)
+    reps = 1
+    iterations = 0
+    while True:
+        iterations += 1
+        results = {}
+        for pt, result in objective.evaluate_many(survivors, repetitions=reps):
+            results[pt] = result
+        times.update(results)
+
+        if len(survivors) == 1:
+            break
+        keep = int(math.ceil(len(survivors) / float(ETA)))
+        survivors = sorted(results, key=lambda x: results[x])[:keep]
+        if keep == 1 and reps == repetitions:
+            break # Already measured with full statistics
+        reps = min(reps * ETA, repetitions)
+        if keep == 1:
+            reps = repetitions
+
+    return SearchResult(survivors[0], times, iterations)
+
+def tune_successive_halving(objective, opts):
+    return successive_halving(objective, grid_points(opts, 32),
+                              opts.repetitions)
@@ -0,0 +1,379 @@
+import bisect
+import csv
+import heapq
+import math
+import os
+import struct
+import sys
+import tempfile
+import threading
+from array import array
+
+from .point import Point
+from .testresult import TestResult
+
+# Columns that must be present in a CSV file of test data
+REQUIRED_COLUMNS = ['num_gangs', 'vector_length', 'time', 'stdev']
+
+# Optional column with the time it took to compile each point, in seconds
+COMPILE_TIME_COLUMN = 'compile time'
+
+# Simulated times are never less than this fraction of the recorded average,
+# since the normal distribution they are drawn from allows negative times
+MIN_SAMPLE_FRACTION = 0.01
+
+# ReplayData.load keeps a binary copy of the data loaded from a CSV file in a
+# file with this suffix appended to its name
+CACHE_SUFFIX = '.replay'
+
+# The cache file starts with a header: magic number (which changes with the
+# format), byte order of the arrays, modification time and size of the CSV
+# file, and the numbers of num_gangs and vector_length values.  The arrays
+# of doubles follow: num_gangs values, vector_length values, times, standard
+# deviations and compile times.  Last are the number of errors, and for each,
+# its index, length and UTF-8 text.
+CACHE_MAGIC = b'OACCRPL1'
+CACHE_HEADER = struct.Struct('=8s1sdqII')
+CACHE_COUNT = struct.Struct('=I')
+CACHE_ERROR = struct.Struct('=II')
+
+class ReplayData(object):
+    '''Timing data recorded for every point of a lattice, e.g., by an
+    exhaustive grid search run with --write-csv.
+
+    The data is kept in dense arrays indexed by the positions of num_gangs and
+    vector_length among the values present in the data, so looking up a
+    point takes constant time.  Percentiles are found by binary search in the
+    sorted times.
+    '''
+
+    def __init__(self, rows):
+        '''rows is a list of tuples (num_gangs, vector_length, time, stdev,
+        error, compile_time), where error is None for points that were timed
+        successfully and compile_time is None if it was not recorded'''
+        self._set_axes(sorted(set(row[0] for row in rows)),
+                       sorted(set(row[1] for row in rows)))
+
+        size = len(self.gangs) * len(self.vector_lengths)
+        nan = float('nan')
+        self.times = array('d', [nan]) * size # NaN where there is no data
+        self.stdevs = array('d', [nan]) * size
+        self.compile_times = array('d', [nan]) * size
+        self.errors = {} # Index => error message
+        for g, v, time, stdev, error, compile_time in rows:
+            i = self._index(g, v)
+            self.times[i] = time
+            self.stdevs[i] = stdev
+            if compile_time is not None:
+                self.compile_times[i] = compile_time
+            if error is not None:
+                self.errors[i] = error
+            else:
+                self.errors.pop(i, None) # A later row replaces an earlier one
+        self._sort_times()
+
+    def _set_axes(self, gangs, vector_lengths):
+        self.gangs = gangs
+        self.vector_lengths = vector_lengths
+        self.gang_index = dict((g, i) for i, g in enumerate(self.gangs))
+        self.vector_index = dict(
+                (v, i) for i, v in enumerate(self.vector_lengths))
+
+    def _sort_times(self):
+        self.sorted_times = sorted(t for t in self.times if t == t)
+        self.count = len(self.sorted_times)
+
+    @classmethod
+    def load(cls, csv_filename):
+        '''Loads data from a CSV file in the format written by --write-csv,
+        reusing the binary cache file written the last time it was loaded
+        (see CACHE_SUFFIX) if the CSV file has not changed since
+
+        Raises ValueError if the file is not in that format.
+        '''
+        cache_filename = csv_filename + CACHE_SUFFIX
+        st = os.stat(csv_filename)
+        try:
+            with open(cache_filename, 'rb') as f:
+                data = cls._read_cache(f, st)
+            if data is not None:
+                return data
+        except (IOError, OSError, EOFError, ValueError, struct.error):
+            pass # Missing or damaged; replace it
+
+        data = cls.from_csv(csv_filename)
+        # Write to a temporary file and rename it, so concurrent loads never
+        # see part of a cache file.  The cache is only an optimization, so
+        # failing to write it (e.g., in a read-only directory) is ignored.
+        try:
+            fd, tmp = tempfile.mkstemp(
+                    dir=os.path.dirname(os.path.abspath(cache_filename)),
+                    prefix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    data._write_cache(f, st)
+                os.rename(tmp, cache_filename)
+            finally:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+        except (IOError, OSError):
+            pass
+        return data
+
+    @classmethod
+    def _read_cache(cls, f, st):
+        # Returns None if the cache does not match the CSV file's stat st
+        magic, byteorder, mtime, size, ngangs, nvectors = \
+                CACHE_HEADER.unpack(f.read(CACHE_HEADER.size))
+        if magic != CACHE_MAGIC or \
+                byteorder != sys.byteorder[0].encode('ascii') or \
+                mtime != st.st_mtime or size != st.st_size:
+            return None
+
+        def read_array(count):
+            values = array('d')
+            values.fromfile(f, count)
+            return values
+
+        data = cls.__new__(cls)
+        data._set_axes(list(read_array(ngangs)), list(read_array(nvectors)))
+        data.times = read_array(ngangs * nvectors)
+        data.stdevs = read_array(ngangs * nvectors)
+        data.compile_times = read_array(ngangs * nvectors)
+        data.errors = {}
+        count, = CACHE_COUNT.unpack(f.read(CACHE_COUNT.size))
+        for n in range(count):
+            i, length = CACHE_ERROR.unpack(f.read(CACHE_ERROR.size))
+            msg = f.read(length)
+            if not isinstance(msg, str): # Python 3
+                msg = msg.decode('utf-8')
+            data.errors[i] = msg
+        data._sort_times()
+        return data
+
+    def _write_cache(self, f, st):
+        f.write(CACHE_HEADER.pack(CACHE_MAGIC,
+                sys.byteorder[0].encode('ascii'), st.st_mtime, st.st_size,
+                len(self.gangs), len(self.vector_lengths)))
+        array('d', self.gangs).tofile(f)
+        array('d', self.vector_lengths).tofile(f)
+        self.times.tofile(f)
+        self.stdevs.tofile(f)
+        self.compile_times.tofile(f)
+        f.write(CACHE_COUNT.pack(len(self.errors)))
+        for i in sorted(self.errors):
+            msg = self.errors[i]
+            if not isinstance(msg, bytes):
+                msg = msg.encode('utf-8')
+            f.write(CACHE_ERROR.pack(i, len(msg)))
+            f.write(msg)
+
+    @classmethod
+    def from_csv(cls, csv_filename):
+        '''Loads data from a CSV file in the format written by --write-csv
+
+        Raises ValueError if the file is not in that format.
+        '''
+        rows = []
+        with open(csv_filename) as csvfile:
+            reader = csv.DictReader(csvfile)
+            try:
+                for row in reader:
+                    for key in REQUIRED_COLUMNS:
+                        if row.get(key) is None:
+                            raise KeyError(key)
+                    compile_time = row.get(COMPILE_TIME_COLUMN)
+                    if compile_time:
+                        compile_time = float(compile_time)
+                    else:
+                        compile_time = None
+                    rows.append((float(row['num_gangs']),
+                                 float(row['vector_length']),
+                                 float(row['time']), float(row['stdev']),
+                                 row.get('error msg') or None, compile_time))
+            except KeyError as e:
+                raise ValueError(
+                        'Invalid CSV file format: missing column {0}'.format(e))
+            except ValueError as e:
+                raise ValueError('Error in CSV file {0}, line {1}: {2}'.format(
+                        csv_filename, reader.line_num, e))
+        if not rows:
+            raise ValueError('CSV file {0} contains no data'.format(
+                    csv_filename))
+        return cls(rows)
+
+    def _index(self, g, v):
+        return self.gang_index[g] * len(self.vector_lengths) + \
+                self.vector_index[v]
+
+    def index(self, point):
+        '''Returns the position of a point in the arrays, or None if there is
+        no data for it'''
+        try:
+            i = self._index(point[0], point[1])
+        except KeyError:
+            return None
+        if self.times[i] != self.times[i]: # NaN: not in the data
+            return None
+        return i
+
+    def result(self, point):
+        '''Returns the recorded TestResult for a point, or None if there is
+        no data for it'''
+        i = self.index(point)
+        if i is None:
+            return None
+        if i in self.errors:
+            return TestResult(point, error=self.errors[i])
+        return TestResult(point, self.times[i], self.stdevs[i])
+
+    def results(self, points):
+        '''Returns the recorded TestResults for a batch of points'''
+        return [self.result(point) for point in points]
+
+    def compile_time(self, point):
+        '''Returns the recorded compile time of a point, or None'''
+        i = self.index(point)
+        if i is None or self.compile_times[i] != self.compile_times[i]:
+            return None
+        return self.compile_times[i]
+
+    def sample(self, point, repetitions, rng):
+        '''Simulates measuring a point again
+
+        Draws repetitions times from a normal distribution with the recorded
+        average and standard deviation of the point, using the random.Random
+        rng, and returns a TestResult with their average and standard
+        deviation.  Returns the recorded result for points with an error, or
+        None if there is no data for the point.
+        '''
+        result = self.result(point)
+        if result is None or result.has_error:
+            return result
+        floor = result.average * MIN_SAMPLE_FRACTION
+        times = [max(rng.gauss(result.average, result.stdev), floor)
+                 for i in range(repetitions)]
+        avg = sum(times) / len(times)
+        if len(times) == 1:
+            stdev = 0.0
+        else:
+            stdev = math.sqrt(sum((t - avg)**2 for t in times) /
+                              (len(times) - 1))
+        return TestResult(point, avg, stdev)
+
+    def best(self):
+        '''Returns the TestResult of the fastest point, including its time
+        even if it has an error'''
+        return self._extreme(lambda a, b: a < b)
+
+    def worst(self):
+        '''Returns the TestResult of the slowest point'''
+        return self._extreme(lambda a, b: a >= b)
+
+    def _extreme(self, better):
+        found = None
+        for g in self.gangs:
+            for v in self.vector_lengths:
+                i = self._index(g, v)
+                time = self.times[i]
+                if time == time and (found is None or
+                        better(time, self.times[found[0]])):
+                    found = (i, Point(g, v))
+        i, point = found
+        return TestResult(point, self.times[i], self.stdevs[i],
+                          self.errors.get(i))
+
+    def percentile(self, time):
+        '''Returns the percentage of points in the data at least as fast as
+        the given time'''
+        count = bisect.bisect_right(self.sorted_times, time)
+        return int(round(float(count) / self.count * 100))
+
+def schedule(durations, workers):
+    '''Returns a list of the (start, end) times of jobs with the given
+    durations on a number of workers, each job starting in order on the first
+    worker that becomes free (list scheduling)'''
+    free = [0.0] * min(workers, max(len(durations), 1))
+    times = []
+    for duration in durations:
+        start = heapq.heappop(free)
+        times.append((start, start + duration))
+        heapq.heappush(free, start + duration)
+    return times
+
+def makespan(durations, workers):
+    '''Returns the time taken to run jobs with the given durations on a
+    number of workers (see schedule)'''
+    return max([end for start, end in schedule(durations, workers)] or [0.0])
+
+class ReplayCost(object):
+    '''Simulates the time a search would take on real hardware when it is
+    replayed from test data.
+
+    Every test of a point costs the time to compile it (its recorded compile
+    time, or compile_cost seconds if there is none) plus its time multiplied
+    by the number of repetitions.  Points are grouped into batches: a search
+    method tests the points of a batch (e.g., one call to
+    objective.evaluate_many) concurrently, but must wait for a batch to finish
+    before starting the next one.  The wall-clock time with N workers is the
+    sum of the makespans of the batches on N workers.
+
+    If keep_executables is True, a point tested again is not compiled again
+    (see CompilePool).
+    '''
+
+    def __init__(self, compile_cost=0.0, keep_executables=False):
+        self.compile_cost = compile_cost or 0.0
+        self.keep_executables = keep_executables
+        self.compiled = set() # Points tested so far
+        self.batches = []
+        self.lock = threading.Lock()
+        self.depth = 0 # Batches started but not finished
+
+    def start_batch(self):
+        # Batches started while another is in progress (e.g., by searches
+        # running concurrently) are merged into it
+        with self.lock:
+            if self.depth == 0:
+                self.batches.append([])
+            self.depth += 1
+
+    def end_batch(self):
+        with self.lock:
+            self.depth -= 1
+
+    def cost(self, result, repetitions, compile_time=None):
+        '''Returns the cost of testing a point with the given result, and its
+        recorded compile time (if any)'''
+        if self.keep_executables and result.point in self.compiled:
+            compile_time = 0.0
+        elif compile_time is None:
+            compile_time = self.compile_cost
+        cost = compile_time
+        if not result.has_error:
+            cost += result.average * repetitions
+        return cost
+
+    def add(self, result, repetitions, compile_time=None):
+        '''Records the test of a point with the given result, and its
+        recorded compile time (if any)'''
+        cost = self.cost(result, repetitions, compile_time)
+        with self.lock:
+            if self.depth == 0:
+                self.batches.append([]) # Tested outside of any batch
+            self.batches[-1].append(cost)
+            self.compiled.add(result.point)
+
+    @property
+    def tests(self):
+        '''Number of tests recorded'''
+        return sum(len(batch) for batch in self.batches)
+
+    @property
+    def total(self):
+        '''Total compile and run time of every test, in seconds'''
+        return sum(sum(batch) for batch in self.batches)
+
+    def wall_time(self, workers=1):
+        '''Simulated wall-clock time with the given number of workers'''
+        return sum(makespan(batch, workers) for batch in self.batches)
@@ -1,5 +1,6 @@
 import csv
 import os
+import threading
 from xml.sax.saxutils import escape
 
 from collections import namedtuple
@@ -13,18 +14,21 @@ class ResultWriter(object):
         self.data_files = data_files
         self.csv_file = None
         self.all_runs = []
+        self.lock = threading.Lock() # Points may be tested concurrently
 
     def __enter__(self):
         if self.data_files.csv:
             self._start_csv()
         return self
 
-    def add(self, test_result):
+    def add(self, test_result, compile_time=None):
         if self.csv_file:
-            self._add_row_to_csv(test_result)
+            with self.lock:
+                self._add_row_to_csv(test_result, compile_time)
 
     def log_run(self, point, time):
-        self.all_runs.append((point, time))
+        with self.lock:
+            self.all_runs.append((point, time))
 
     def write_result(self, search_result, reps):
         if self.data_files.gnuplot is not None:
@@ -41,13 +45,16 @@ class ResultWriter(object):
         self.csv_writer = csv.writer(self.csv_file, delimiter=',',
             quotechar='"', quoting=csv.QUOTE_MINIMAL)
         self.csv_writer.writerow(['num_gangs', 'vector_length', 'time',
-            'stdev', 'error msg'])
+            'stdev', 'compile time', 'error msg'])
 
-    def _add_row_to_csv(self, test_result):
+    def _add_row_to_csv(self, test_result, compile_time):
+        # The compile time is left empty if the point was not compiled for
+        # this test (e.g., its executable was cached)
         row = [ '{0:.0f}'.format(test_result.point[0]),
                 '{0:.0f}'.format(test_result.point[1]),
                 test_result.average,
-                test_result.stdev ]
+                test_result.stdev,
+                '' if compile_time is None else compile_time ]
         if test_result.error:
             row.append(test_result.error)
         self.csv_writer.writerow(row)
@@ -0,0 +1,425 @@
+import ctypes
+import logging
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import timeit
+
+from .utilities import (CommandTimedOut, OutputScanner, call_command,
+        kill_command, start_command)
+
+KERNEL_TIMING_RE = re.compile(r'Accelerator Kernel Timing data\n'
+        r'(?:[^\n]*\n){2}'
+        r'\s*time\(us\): ([\d,]+)')
+
+LOGGER = logging.getLogger('tuner')
+
+# Runs are never killed for being slower than the best point so far before
+# this many seconds, to allow for process startup
+MIN_CENSOR_TIMEOUT = 1.0
+
+# Error recorded for points whose runs are killed for being too slow
+CENSORED_ERROR = 'Run censored (too slow)'
+
+class RunError(Exception):
+    '''Raised by a runner when the executable cannot be timed.
+
+    The message is recorded as the error of the point's TestResult.
+    '''
+    pass
+
+def time_pattern(opts):
+    '''Returns the regular expression matching timing data under opts'''
+    return KERNEL_TIMING_RE if opts.kernel_timing else opts.time_regexp
+
+def match_time(opts, match):
+    '''Returns the time, in seconds, in a match of time_pattern(opts)'''
+    if opts.kernel_timing:
+        return float(match.group(1).replace(',', '')) * 1e-6
+    else:
+        return float(match.group(1))
+
+def missing_time(opts, output, prefix):
+    '''Logs output that did not contain timing data and returns a RunError'''
+    if opts.kernel_timing:
+        LOGGER.error('%s Output from %s did not contain PGI '
+                'kernel timing data.  This is likely a problem '
+                'with your program or compile command.  The '
+                'output was: "%s"', prefix, opts.executable,
+                output)
+        return RunError('PGI kernel timing data missing')
+    else:
+        LOGGER.error('%s Output from %s did not contain timing '
+                ' data.  This is likely a problem with your '
+                'program or output regex "%s".  The '
+                'output was: "%s"', prefix, opts.executable,
+                opts.time_regexp.pattern, output)
+        return RunError('Timing data missing')
+
+def launch_timeout(timeout, timeout_error, censor, timings):
+    '''Returns a tuple (timeout, timeout_error) for a launch of the
+    executable that is expected to report the given number of times
+
+    timeout applies to the launch as a whole.  censor is a limit for each
+    time reported (see ProcessRunner.samples), so the launch is censored
+    after censor * timings seconds if that is sooner.
+    '''
+    if censor is not None:
+        limit = max(censor * timings, MIN_CENSOR_TIMEOUT)
+        if timeout is None or limit < timeout:
+            return limit, CENSORED_ERROR
+    return timeout, timeout_error
+
+class ProcessRunner(object):
+    '''Runs the executable once for every repetition
+
+    Output is scanned for timing data as it is produced, and only the end of
+    it is kept (for error messages), so programs printing large amounts of
+    output don't use up memory.
+
+    The first opts.warmup times reported by each process are discarded.  If
+    opts.all_matches is set, every other time a process reports counts as a
+    repetition, so a program that runs its kernel in a loop needs to be
+    started fewer times.
+    '''
+
+    def __init__(self, opts):
+        self.opts = opts
+
+    def samples(self, command, env, point, prefix, repetitions,
+            timeout=None, timeout_error=None, censor=None):
+        '''Generates the time of each repetition of a point
+
+        command -- command line that runs the executable for this point
+        env -- environment variables for the executable
+        point -- the Point being tested
+        prefix -- prefix for log messages about this point
+        repetitions -- number of times to run the executable
+        timeout -- if not None, a run is killed after this many seconds, and
+                   RunError(timeout_error) is raised
+        censor -- if not None, a run is also killed after this many seconds
+                  for every time it is expected to report (including warmup
+                  times), and RunError(CENSORED_ERROR) is raised
+        '''
+        warmup = self.opts.warmup
+        if self.opts.all_matches:
+            max_matches = None
+        else:
+            max_matches = warmup + 1
+
+        remaining = repetitions
+        expected = repetitions # Times counted from each launch
+        while remaining > 0:
+            if self.opts.all_matches:
+                # Every time reported counts, up to the number reported by
+                # the last launch (if any)
+                expected = min(remaining, expected)
+            else:
+                expected = 1
+            limit, limit_error = launch_timeout(timeout, timeout_error,
+                    censor, warmup + expected)
+
+            LOGGER.debug('%s Running %s', prefix, command)
+            scanner = OutputScanner(time_pattern(self.opts), max_matches)
+            try:
+                output, return_code = call_command(command, env=env,
+                        timeout=limit, scanner=scanner)
+            except CommandTimedOut:
+                _log_timeout(prefix, command, limit)
+                raise RunError(limit_error)
+
+            if return_code != 0 and not self.opts.ignore_exit:
+                LOGGER.error('%s Command %s failed with exit code %d', prefix,
+                        command, return_code)
+                # Don't record time; assume subsequent reps will fail
+                raise RunError('Executable failed')
+
+            matches = scanner.matches[warmup:]
+            if not matches:
+                raise missing_time(self.opts, output, prefix)
+            if len(matches) > 1:
+                LOGGER.debug('%s Found %d times in output', prefix,
+                        len(matches))
+            expected = len(matches)
+            for match in matches[:remaining]:
+                remaining -= 1
+                yield match_time(self.opts, match)
+
+    def close(self):
+        pass
+
+def _log_timeout(prefix, command, timeout):
+    LOGGER.info('%s Killed %s after %.3f seconds', prefix, command, timeout)
+
+# Number of lines of output kept from a server for error messages
+_SERVER_TAIL_LINES = 20
+
+# Seconds a server is given to exit after its standard input is closed, and to
+# finish each run left over when the tuner stops early (if there is no run
+# timeout), before it is killed
+SERVER_EXIT_TIMEOUT = 5.0
+
+class ServerRunner(object):
+    '''Keeps the executable running and requests repetitions over its stdin
+
+    For each point, the tuner writes a line containing num_gangs,
+    vector_length and the number of repetitions, separated by spaces, to the
+    executable's standard input.  The executable must run the kernel that many
+    times and print one line matching the time regexp after each run; other
+    lines are ignored.  When the tuner is finished with an executable, it
+    closes its standard input, and the executable should exit; if it has not
+    exited after SERVER_EXIT_TIMEOUT seconds, it is killed.
+
+    With runtime parameters, the same process is used for consecutive points
+    that run the same command line, so the executable is started only once.
+    Otherwise the executable is rebuilt for every point, so a new process is
+    started for each one.
+    '''
+
+    def __init__(self, opts):
+        self.opts = opts
+        self.handle = None
+        self.command = None
+        self.tail = []
+        self.timed_out = False
+
+    def samples(self, command, env, point, prefix, repetitions,
+            timeout=None, timeout_error=None, censor=None):
+        '''Generates the time of each repetition of a point
+
+        The arguments are the same as for ProcessRunner.samples; the limits
+        apply to each run requested.  If a run times out, the executable is
+        killed and restarted for the next point.  If opts.adaptive is set,
+        runs are requested one at a time, since the caller may stop after
+        any of them.  opts.warmup extra runs are requested with the first
+        request for the point, and their times are discarded.
+        '''
+        timeout, timeout_error = launch_timeout(timeout, timeout_error,
+                censor, 1)
+        if (self.handle is None or command != self.command or
+                not self.opts.runtime_params):
+            self.close()
+            LOGGER.debug('%s Starting %s', prefix, command)
+            self.handle = start_command(command,
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT, # Redirect stderr to stdout
+                    env=env)
+            self.command = command
+            self.tail = []
+
+        remaining = repetitions
+        warmup = self.opts.warmup # Warm-up runs not read yet
+        requested = 0 # Runs requested but not read yet
+        try:
+            while remaining > 0:
+                if requested == 0:
+                    if self.opts.adaptive:
+                        requested = warmup + 1
+                    else:
+                        requested = warmup + remaining
+                    self._request(point, requested, prefix)
+                match = self._read_time(prefix, timeout, timeout_error)
+                requested -= 1
+                if warmup > 0:
+                    warmup -= 1
+                    continue
+                remaining -= 1
+                yield float(match.group(1))
+        finally:
+            if requested > 0 and self.handle is not None:
+                self._drain(requested, timeout)
+
+    def _request(self, point, runs, prefix):
+        request = '{0:.0f} {1:.0f} {2}\n'.format(point[0], point[1], runs)
+        LOGGER.debug('%s Requesting %d runs from %s', prefix, runs,
+                self.command)
+        try:
+            self.handle.stdin.write(request.encode('ascii'))
+            self.handle.stdin.flush()
+        except (IOError, OSError):
+            self._fail(prefix) # The executable has already exited
+
+    def close(self):
+        if self.handle is not None:
+            try:
+                self.handle.stdin.close()
+            except (IOError, OSError):
+                pass
+            timer = self._kill_after(SERVER_EXIT_TIMEOUT)
+            try:
+                self.handle.wait()
+            finally:
+                timer.cancel()
+            kill_command(self.handle) # Clean up processes left behind
+            self.handle = None
+
+    def _kill_after(self, seconds):
+        '''Starts a timer that kills the executable after the given number of
+        seconds, setting self.timed_out'''
+        handle = self.handle
+        def expire():
+            self.timed_out = True
+            kill_command(handle)
+        self.timed_out = False
+        timer = threading.Timer(seconds, expire)
+        timer.daemon = True
+        timer.start()
+        return timer
+
+    def _drain(self, remaining, timeout):
+        '''Reads the rest of the requested runs after the caller stops early,
+        so the next request starts with a clean slate
+
+        If they take longer than the run timeout (or SERVER_EXIT_TIMEOUT)
+        each, the executable is killed, and restarted for the next point.
+        '''
+        timer = self._kill_after((timeout or SERVER_EXIT_TIMEOUT) * remaining)
+        try:
+            while remaining > 0:
+                line = self.handle.stdout.readline()
+                if not line:
+                    break
+                if self.opts.time_regexp.search(line.decode('utf8', 'replace')):
+                    remaining -= 1
+        finally:
+            timer.cancel()
+        if remaining > 0:
+            self.close()
+
+    def _read_time(self, prefix, timeout, timeout_error):
+        '''Reads output until the time of the next run is reported'''
+        timer = None
+        if timeout is not None:
+            timer = self._kill_after(timeout)
+        try:
+            while True:
+                line = self.handle.stdout.readline()
+                if not line:
+                    if self.timed_out:
+                        self.close()
+                        _log_timeout(prefix, self.command, timeout)
+                        raise RunError(timeout_error)
+                    self._fail(prefix)
+                line = line.decode('utf8', 'replace')
+                self.tail = self.tail[1-_SERVER_TAIL_LINES:] + [line]
+                match = self.opts.time_regexp.search(line)
+                if match:
+                    return match
+        finally:
+            if timer is not None:
+                timer.cancel()
+
+    def _fail(self, prefix):
+        for pipe in (self.handle.stdin, self.handle.stdout):
+            try:
+                pipe.close()
+            except (IOError, OSError):
+                pass
+        return_code = self.handle.wait()
+        self.handle = None
+        LOGGER.error('%s Command %s exited with code %d before reporting all '
+                'of the requested times.  The last lines of output were: "%s"',
+                prefix, self.command, return_code, ''.join(self.tail))
+        raise RunError('Executable failed')
+
+class SharedLibraryRunner(object):
+    '''Calls a function in a shared library, inside the tuner's own process
+
+    The "executable" must be a shared library exporting the function
+
+        double run(int num_gangs, int vector_length);
+
+    which runs the kernel once and returns its time in seconds (or a negative
+    number if it fails).  Each repetition is a single function call, so no
+    output needs to be parsed.  A library that crashes takes the tuner down
+    with it.
+    '''
+
+    def __init__(self, opts):
+        self.opts = opts
+        self.lib = None
+        self.lib_key = None
+
+    def samples(self, command, env, point, prefix, repetitions,
+            timeout=None, timeout_error=None, censor=None):
+        '''Generates the time of each repetition of a point
+
+        The arguments are the same as for ProcessRunner.samples; command is
+        the path of the shared library, and the limits apply to each call.
+        Since a function call cannot be interrupted, the timeout is checked
+        only after each call returns.
+        '''
+        timeout, timeout_error = launch_timeout(timeout, timeout_error,
+                censor, 1)
+        run = self._load(command.strip(), prefix)
+        for i in range(repetitions):
+            LOGGER.debug('%s Calling run() in %s', prefix, command)
+            start = timeit.default_timer()
+            time = run(int(point[0]), int(point[1]))
+            if timeout is not None and timeit.default_timer() - start > timeout:
+                _log_timeout(prefix, command, timeout)
+                raise RunError(timeout_error)
+            if time < 0:
+                LOGGER.error('%s run() in %s returned %f', prefix, command,
+                        time)
+                raise RunError('Executable failed')
+            yield time
+
+    def close(self):
+        if self.lib is not None:
+            # ctypes does not unload libraries, but the platform's dlclose
+            # can be reached through _ctypes on POSIX systems
+            import _ctypes
+            dlclose = getattr(_ctypes, 'dlclose', None)
+            if dlclose is not None:
+                dlclose(self.lib._handle)
+            self.lib = self.lib_key = None
+
+    def _load(self, path, prefix):
+        try:
+            st = os.stat(path)
+        except OSError as e:
+            LOGGER.error('%s Unable to load %s: %s', prefix, path, e)
+            raise RunError('Shared library failed to load')
+
+        # The same library is reused until it is rebuilt (e.g., for the next
+        # point when parameters are set at compile time)
+        key = (os.path.abspath(path), st.st_mtime, st.st_size)
+        if key != self.lib_key:
+            self.close()
+            # The dynamic loader returns the already loaded library when
+            # asked for the same path again, so load a private copy
+            fd, copy = tempfile.mkstemp(prefix='optacc-', suffix='.so')
+            os.close(fd)
+            try:
+                shutil.copy2(path, copy)
+                LOGGER.debug('%s Loading %s', prefix, path)
+                self.lib = ctypes.CDLL(os.path.abspath(copy))
+                self.lib_key = key
+            except OSError as e:
+                LOGGER.error('%s Unable to load %s: %s', prefix, path, e)
+                raise RunError('Shared library failed to load')
+            finally:
+                os.remove(copy)
+
+        try:
+            run = self.lib.run
+        except AttributeError:
+            LOGGER.error('%s %s does not export a run() function', prefix,
+                    path)
+            raise RunError('Shared library failed to load')
+        run.argtypes = [ctypes.c_int, ctypes.c_int]
+        run.restype = ctypes.c_double
+        return run
+
+def make_runner(opts):
+    '''Returns the runner used to time the executable under opts'''
+    if opts.shared_library:
+        return SharedLibraryRunner(opts)
+    if opts.server:
+        return ServerRunner(opts)
+    return ProcessRunner(opts)
@@ -0,0 +1,111 @@
+from multiprocessing.pool import ThreadPool
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue # Python 2
+
+def slot_environment(opts, slot):
+    '''Returns the environment variables assigned to a device slot
+
+    Each entry of opts.slot_env has the form NAME=VALUE, where {slot} in the
+    value is replaced by the slot number.
+    '''
+    env = {}
+    for assignment in opts.slot_env or []:
+        name, value = assignment.split('=', 1)
+        env[name] = value.replace('{slot}', str(slot))
+    return env
+
+class SlotScheduler(object):
+    '''Tests independent points concurrently, one per device slot.
+
+    evaluate(x, slot) is called to test a point; it is given the number of
+    a slot that no other point is using until it returns.  Every repetition
+    of a point runs in the same slot, so times measured on different devices
+    are never mixed in one result.  With a single slot, points are tested
+    one at a time in the calling thread.
+    '''
+
+    def __init__(self, evaluate, slots):
+        self._evaluate = evaluate
+        self.slots = slots
+        self.free = queue.Queue()
+        for slot in range(slots):
+            self.free.put(slot)
+        if slots > 1:
+            self.pool = ThreadPool(slots)
+        else:
+            self.pool = None
+
+    def evaluate(self, x, **kwargs):
+        '''Tests a point in the first slot that becomes free
+
+        Keyword arguments are passed on to the evaluate function.
+        '''
+        slot = self.free.get()
+        try:
+            return self._evaluate(x, slot, **kwargs)
+        finally:
+            self.free.put(slot)
+
+    def evaluate_many(self, points, results=None, **kwargs):
+        '''Tests several points concurrently, generating a tuple
+        (point, result) as each one finishes
+
+        Points are taken from the iterable as slots become free, so a caller
+        that stops early (e.g., once it finds an improvement) prevents the
+        remaining points from being tested.  Points that are already running
+        when the caller stops are allowed to finish once the generator is
+        closed.  If results is not None, the result of every point tested,
+        including those, is added to that dict (point => result).  With a
+        single slot, each point is only tested when the caller asks for the
+        next result.
+        '''
+        if self.pool is None:
+            for x in points:
+                result = self.evaluate(x, **kwargs)
+                if results is not None:
+                    results[x] = result
+                yield x, result
+            return
+
+        points = iter(points)
+        done = queue.Queue()
+        running = {}
+        count = 0
+        try:
+            while True:
+                while len(running) < self.slots:
+                    try:
+                        x = next(points)
+                    except StopIteration:
+                        break
+                    task = self.pool.apply_async(self._run,
+                            (x, count, done), kwargs)
+                    running[count] = (x, task)
+                    count += 1
+                if not running:
+                    break
+                x, task = running.pop(done.get())
+                result = task.get()
+                if results is not None:
+                    results[x] = result
+                yield x, result
+        finally:
+            for x, task in running.values():
+                task.wait()
+                if results is not None and task.successful():
+                    results[x] = task.get()
+
+    def _run(self, x, key, done, **kwargs):
+        '''Tests a point on a pool thread, then reports it as finished'''
+        try:
+            return self.evaluate(x, **kwargs)
+        finally:
+            done.put(key)
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
@@ -23,6 +23,11 @@ def _t(deg_freedom): # 0.95 quantile of t-variate
     index = min(index, len(table)-1)
     return table[index]
 
+def confidence_interval(ns):
+    '''Returns the half-width of the 90% confidence interval for the mean'''
+    n = len(ns)
+    return _t(n-1) * _stdev(ns) / math.sqrt(n)
+
 def is_diff_significant(avg_a, stdev_a, n_a, avg_b, stdev_b, n_b):
     sa2_na = stdev_a**2 / n_a
     sb2_nb = stdev_b**2 / n_b
@@ -42,3 +47,11 @@ def is_diff_significant(avg_a, stdev_a, n_a, avg_b, stdev_b, n_b):
 
     # If the confidence interval contains 0, not significantly different
     return not (low <= 0 <= high)
+
+def is_significantly_slower(ns, avg_b, stdev_b, n_b):
+    '''Returns True if the mean of the times ns is significantly greater
+    than avg_b, the mean of n_b other times with standard deviation stdev_b
+    '''
+    avg_a = _avg(ns)
+    return avg_a > avg_b and is_diff_significant(avg_a, _stdev(ns), len(ns),
+                                                 avg_b, stdev_b, n_b)
@@ -1,125 +1,176 @@
-import csv
 import logging
 import math
 import os
-import re
+import random
 import sys
+import threading
 
 from .result_writer import ResultFiles, ResultWriter
-from .point import Point
-from .utilities import call_command
+from .replay import ReplayCost, ReplayData, schedule
+from .compile_pool import CompilePool
+from .eval_store import EvaluationStore
+from .runners import RunError, make_runner
+from .scheduler import SlotScheduler, slot_environment
+from .stats import confidence_interval, is_significantly_slower
+from .utilities import point_prefix
 from .testresult import TestResult
 
-from .methods.nelder_mead import tune as tune_nelder_mead
-from .methods.coord_search import tune_coord_search
+from .methods.nelder_mead import (tune as tune_nelder_mead,
+        tune_speculative as tune_nelder_mead_speculative,
+        tune_multi_start as tune_nelder_mead_multi_start)
+from .methods.adaptive_grid import tune_adaptive_grid
+from .methods.bayes_opt import tune_bayes_opt
+from .methods.coord_search import (tune_coord_search,
+        tune_coord_search_parallel)
+from .methods.sampling import tune_sobol, tune_latin_hypercube
+from .methods.successive_halving import tune_successive_halving
 from .methods.grid_search import (tune_grid_pow2, tune_grid_32,
         tune_grid_64, tune_grid_128, tune_grid_256,
         tune_grid_32_vlpow2)
 
 METHODS = {
     'nelder-mead': tune_nelder_mead,
+    'nelder-mead-speculative': tune_nelder_mead_speculative,
+    'nelder-mead-multistart': tune_nelder_mead_multi_start,
     'coord-search': tune_coord_search,
+    'coord-search-parallel': tune_coord_search_parallel,
+    'bayes-opt': tune_bayes_opt,
+    'successive-halving': tune_successive_halving,
+    'sobol': tune_sobol,
+    'lhs': tune_latin_hypercube,
     'grid-pow2': tune_grid_pow2,
     'grid32': tune_grid_32,
     'grid64': tune_grid_64,
     'grid128': tune_grid_128,
     'grid256': tune_grid_256,
-    'grid32-vlpow2': tune_grid_32_vlpow2
+    'grid32-vlpow2': tune_grid_32_vlpow2,
+    'grid-adaptive': tune_adaptive_grid
 }
 
-KERNEL_TIMING_RE = re.compile(r'Accelerator Kernel Timing data\n'
-        r'(?:[^\n]*\n){2}'
-        r'\s*time\(us\): ([\d,]+)')
+# Search methods that test the same points more than once; their executables
+# are kept for the whole session, even without --cache-dir (see CompilePool)
+RETESTING_METHODS = ['successive-halving']
 
 LOGGER = logging.getLogger('tuner')
 
-def _gen_tuning_function(opts, output_writer):
+# Minimum number of runs of each point when the number of repetitions is
+# chosen adaptively
+ADAPTIVE_MIN_REPETITIONS = 3
+
+# Errors recorded for points whose compile command or runs are killed
+COMPILE_TIMEOUT_ERROR = 'Compile command timed out'
+RUN_TIMEOUT_ERROR = 'Executable timed out'
+
+def _gen_tuning_function(opts, output_writer, compiler, runners, store=None):
     '''Generates a tunable objective function based on the given options
 
     opts -- TuningOptions representing the tuning parameters
     output_writer -- OutputWriter to record results of tuning
-
-    Returns a function fn(x, repetitions=1), where x is the input tuple and
-    repetitions represents how many times to run the program.
+    compiler -- CompilePool used to build the executable for each point
+    runners -- list of runners used to time the executable (see make_runner),
+               one for each device slot
+    store -- EvaluationStore recording every point tested, or None.  If
+             opts.resume is set, points found in the store are not tested
+             again.
+
+    Returns a function fn(x, repetitions=1, slot=0), where x is the input
+    tuple and repetitions represents how many times to run the program.  If
+    opts.adaptive is set, repetitions is only an upper limit (see
+    _enough_samples).  Every run happens in the given device slot: the
+    executable gets the environment variables from opts.slot_env for that
+    slot.  fn may be called from several threads at once, as long as each
+    uses a different slot.
     '''
 
-    def fn(x, repetitions=1):
-        num_gangs, vector_length = map(int, x)
-        command = opts.compile_command.format(
-                source=opts.source,
-                num_gangs=num_gangs,
-                vector_length=vector_length
-        )
-
-        # Set NUM_GANGS and VECTOR_LENGTH as environment variables so that
-        # Makefiles can make use of these parameters.
-        env = {
-            'NUM_GANGS': str(num_gangs),
-            'VECTOR_LENGTH': str(vector_length)
-        }
-
-        # Copy environment variables for this process.  This is necessary to
-        # preserve $PATH and other variables that might be necessary for
-        # compilation.
-        env.update(os.environ)
-
-        prefix = '[num_gangs:{0:>4.0f}, vector_length:{1:>4.0f}]'.format(
-                num_gangs, vector_length)
-
-        LOGGER.debug('%s Compiling: %s', prefix, command)
-
-        output, return_code = call_command(command, env=env)
-        if return_code != 0:
+    # Best result found so far, and the number of runs behind it
+    incumbent = {'result': None, 'n': 0}
+    incumbent_lock = threading.Lock()
+
+    def fn(x, repetitions=1, slot=0):
+        try:
+            return _test_point(x, repetitions, slot)
+        finally:
+            compiler.release(x)
+
+    def _test_point(x, repetitions, slot):
+        prefix = point_prefix(x)
+        if opts.slots > 1:
+            prefix += ' [slot {0}]'.format(slot)
+
+        if store is not None and opts.resume:
+            stored = lookup(x, repetitions, prefix)
+            if stored is not None:
+                result, times = stored
+                LOGGER.info('%s Average: %f, Standard Deviation: %f '
+                        '(from %s)', prefix, result.average, result.stdev,
+                        opts.store)
+                for time in times:
+                    output_writer.log_run(x, time)
+                update_incumbent(result, len(times))
+                output_writer.add(result)
+                return result
+
+        build = compiler.compile(x)
+
+        # With runtime parameters, the single build is shared by all points,
+        # so no point has a compile time of its own
+        compile_time = None
+        if not opts.runtime_params:
+            compile_time = build.elapsed
+
+        if build.timed_out:
+            LOGGER.error('%s Compile command was killed after %g seconds.  '
+                    'Skipping this point.  (Compiler output was: "%s")',
+                    prefix, opts.compile_timeout, build.output)
+            return record(TestResult(x, error=COMPILE_TIMEOUT_ERROR), [],
+                    compile_time)
+        if build.return_code != 0:
             LOGGER.error('%s Compile command failed with exit code %d.  '
                     'Skipping this point.  (Compiler output was: "%s")',
-                    prefix, return_code, output)
+                    prefix, build.return_code, build.output)
             # Compiler failed, cannot continue
-            result = TestResult(x, error='Compile command failed')
-            output_writer.add(result)
-            return result
+            return record(TestResult(x, error='Compile command failed'), [],
+                    compile_time)
+
+        # The parameters are also available to the executable in its
+        # environment, and for programs that read them at run time, through
+        # placeholders in its command line.  Otherwise the command line is
+        # used as given, since it may contain literal braces.
+        command = build.executable
+        if opts.runtime_params:
+            command = command.format(
+                    num_gangs=int(x[0]),
+                    vector_length=int(x[1])
+            )
+        env = dict(os.environ)
+        env['NUM_GANGS'] = str(int(x[0]))
+        env['VECTOR_LENGTH'] = str(int(x[1]))
+        env.update(slot_environment(opts, slot))
+
+        # Kill runs that take much longer than the best point so far; the
+        # point can't be the optimum, so there is no need to know how slow
+        # it really is.  The limit is per time reported, since one launch may
+        # run the kernel several times.
+        with incumbent_lock:
+            best, best_n = incumbent['result'], incumbent['n']
+        censor = None
+        if opts.timeout_factor is not None and best is not None:
+            censor = opts.timeout_factor * best.average
 
         result = None
         results = []
-        for i in range(repetitions):
-            LOGGER.debug('%s Running %s', prefix, opts.executable)
-            output, return_code = call_command(opts.executable)
-
-            if return_code != 0 and not opts.ignore_exit:
-                LOGGER.error('%s Command %s failed with exit code %d', prefix,
-                        opts.executable, return_code)
-                result = TestResult(x, error='Executable failed')
-                break  # Don't record time; assume subsequent reps will fail
-
-            if opts.kernel_timing:
-                match = KERNEL_TIMING_RE.search(output)
-                if not match:
-                    LOGGER.error('%s Output from %s did not contain PGI '
-                            'kernel timing data.  This is likely a problem '
-                            'with your program or compile command.  The '
-                            'output was: "%s"', prefix, opts.executable,
-                            output)
-                    result = TestResult(x,
-                            error='PGI kernel timing data missing')
-                    break
-
-                time = float(match.group(1).replace(',', '')) * 1e-6
-            else:
-                match = opts.time_regexp.search(output)
-                if not match:
-                    LOGGER.error('%s Output from %s did not contain timing '
-                            ' data.  This is likely a problem with your '
-                            'program or output regex "%s".  The '
-                            'output was: "%s"', prefix, opts.executable,
-                            opts.time_regexp.pattern, output)
-                    result = TestResult(x, error='Timing data missing')
+        try:
+            for time in runners[slot].samples(command, env, x, prefix,
+                    repetitions, opts.run_timeout, RUN_TIMEOUT_ERROR,
+                    censor):
+                LOGGER.debug('%s Time: %f', prefix, time)
+                results.append(time)
+                output_writer.log_run(x, time)
+                if opts.adaptive and _enough_samples(opts, results, best,
+                        best_n, prefix):
                     break
-
-                time = match.group(1)
-
-            time = float(time)
-            LOGGER.debug('%s Time: %f', prefix, time)
-            results.append(time)
-            output_writer.log_run(x, time)
+        except RunError as e:
+            result = TestResult(x, error=str(e))
 
         if result is None:
             if not results:
@@ -136,126 +187,285 @@ def _gen_tuning_function(opts, output_writer):
                         avg, stdev)
                 result = TestResult(x, avg, stdev)
 
-        output_writer.add(result)
+        return record(result, results, compile_time)
+
+    def lookup(x, repetitions, prefix):
+        # A stored result is reused if it has enough runs; with adaptive
+        # repetitions, fewer runs may be enough (see _enough_samples)
+        if not opts.adaptive:
+            return store.lookup(x, repetitions)
+        stored = store.lookup(x, ADAPTIVE_MIN_REPETITIONS)
+        if stored is not None:
+            with incumbent_lock:
+                best, best_n = incumbent['result'], incumbent['n']
+            times = stored[1]
+            if len(times) >= repetitions or _enough_samples(opts, times,
+                    best, best_n, prefix):
+                return stored
+        return None
+
+    def record(result, times, compile_time):
+        # The number of runs actually taken is stored, since with adaptive
+        # repetitions it may be less than the number requested
+        if store is not None:
+            store.add(result, len(times), times)
+        update_incumbent(result, len(times))
+        output_writer.add(result, compile_time)
         return result
+
+    def update_incumbent(result, n):
+        with incumbent_lock:
+            best = incumbent['result']
+            if not result.has_error and (best is None or result < best):
+                incumbent['result'] = result
+                incumbent['n'] = n
     return fn
 
+def _enough_samples(opts, times, incumbent, incumbent_n, prefix):
+    '''Decides whether a point has been run enough times
+
+    After ADAPTIVE_MIN_REPETITIONS runs, sampling stops as soon as the 90%
+    confidence interval for the mean is narrower than opts.ci_width times the
+    mean, or the point is significantly slower than the incumbent (the best
+    result found so far).
+    '''
+    n = len(times)
+    if n < ADAPTIVE_MIN_REPETITIONS:
+        return False
+
+    avg = sum(times) / n
+    if 2 * confidence_interval(times) <= opts.ci_width * avg:
+        LOGGER.debug('%s Confidence interval is narrow enough after %d runs',
+                prefix, n)
+        return True
+
+    if incumbent is not None:
+        try:
+            worse = is_significantly_slower(times, incumbent.average,
+                    incumbent.stdev, incumbent_n)
+        except (ValueError, ZeroDivisionError):
+            worse = False # Not enough variation to perform a T-test
+        if worse:
+            LOGGER.debug('%s Significantly slower than the best point so far '
+                    'after %d runs', prefix, n)
+            return True
+
+    return False
+
 def _load_testing_data(csv_filename):
     '''Loads data points from a CSV file
 
     The format of the file must be the same as those generated by the
-    --write-csv flag for the tuner.
+    --write-csv flag for the tuner.  A binary copy of the data is cached
+    beside the file, to load it quickly next time (see ReplayData.load).
 
-    Returns a dictionary mapping (num_gangs, vector_length) pairs to the
-    timing data for that point.
+    Returns a ReplayData holding the timing data for every point.
     '''
 
     LOGGER.info('TEST MODE - Using timing data from CSV file %s', csv_filename)
-    csv_data = {}
-    with open(csv_filename) as csvfile:
-        try:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                for key in ['num_gangs', 'vector_length', 'time', 'stdev']:
-                    if row[key] is None:
-                        raise KeyError(key)
-
-                key = Point(row['num_gangs'], row['vector_length'])
-                values = { 'time': float(row['time']),
-                           'stdev': float(row['stdev']),
-                           'error msg': row['error msg'] }
-                csv_data[key] = values
-        except KeyError as e:
-            LOGGER.error('Invalid CSV file format: missing column %s', str(e))
-            sys.exit(1)
-        except ValueError as e:
-            LOGGER.error('Error in CSV file %s, line %d: %s',
-                  csv_filename, reader.line_num, e)
-            sys.exit(1)
-    LOGGER.info('            Loaded %d data points', len(csv_data))
+    try:
+        data = ReplayData.load(csv_filename)
+    except ValueError as e:
+        LOGGER.error('%s', e)
+        sys.exit(1)
+    LOGGER.info('            Loaded %d data points', data.count)
 
     # Find the best and worst points in the loaded data
-    sdata = sorted(csv_data, key=lambda x: csv_data[x]['time'])
-    best = sdata[0]
-    worst = sdata[len(sdata)-1]
+    best = data.best()
+    worst = data.worst()
     LOGGER.info(u'            Minimum: %s: %f \u00B1 %f',
-                best, csv_data[best]['time'], csv_data[best]['stdev'])
+                best.point, best.average, best.stdev)
     LOGGER.info(u'            Maximum: %s: %s \u00B1 %f',
-                worst, csv_data[worst]['time'], csv_data[worst]['stdev'])
-
-    known_best_result = TestResult(point=best,
-                                   average=csv_data[best]['time'],
-                                   stdev=csv_data[best]['stdev'],
-                                   error=csv_data[best]['error msg'])
-
-    def percentile(time):
-        n = len(sdata)
-        count = 0
-        for i in range(n):
-            if csv_data[sdata[i]]['time'] <= time:
-                count += 1
-            else:
-                break
-        return int(round(float(count) / n * 100))
-
-    return csv_data, known_best_result, percentile
+                worst.point, worst.average, worst.stdev)
+    return data
 
-def _gen_csv_function(csv_filename, output_writer):
+def _gen_csv_function(csv_filename, output_writer, noise_seed=None,
+        costs=None):
     '''Generates a tunable objective function from a CSV file
 
     Analagous to _gen_tuning_function but for operating on prerecorded CSV
-    data.
+    data.  If noise_seed is not None, each time a point is tested, its result
+    is simulated by drawing the given number of repetitions from a normal
+    distribution with the recorded average and standard deviation (see
+    ReplayData.sample).  The random numbers for each test are seeded with
+    noise_seed, the point and the number of times it was tested before, so
+    they do not depend on the order in which points running in different
+    slots are tested.  If costs is not None, every test is recorded in that
+    ReplayCost.
     '''
 
-    csv_data, known_best, percentile = _load_testing_data(csv_filename)
-    def fn(x, repetitions=1):
-        num_gangs, vector_length = map(int, x)
-
-        prefix = '[num_gangs:{0:>4.0f}, vector_length:{1:>4.0f}]'.format(
-                num_gangs, vector_length)
+    data = _load_testing_data(csv_filename)
+    tests = {} # Point => number of times tested
+    tests_lock = threading.Lock()
+    def fn(x, repetitions=1, slot=0):
+        prefix = point_prefix(x)
 
-        result = None
-        if x not in csv_data:
+        if noise_seed is None:
+            result = data.result(x)
+        else:
+            with tests_lock:
+                n = tests.get(x, 0)
+                tests[x] = n + 1
+            rng = random.Random('{0} {1:.0f} {2:.0f} {3}'.format(
+                    noise_seed, x[0], x[1], n))
+            result = data.sample(x, repetitions, rng)
+        if result is None:
             msg = '{0} not in CSV data'.format(x)
             result = TestResult(x, error=msg)
             LOGGER.error('%s', msg)
-        elif csv_data[x]['error msg'] is not None:
-            result = TestResult(x, error=csv_data[x]['error msg'])
         else:
-            avg = csv_data[x]['time']
-            stdev = csv_data[x]['stdev']
-            LOGGER.info('%s Average: %f, Standard Deviation: %f', prefix,
-                avg, stdev)
-            result = TestResult(x, avg, stdev)
+            if not result.has_error:
+                LOGGER.info('%s Average: %f, Standard Deviation: %f', prefix,
+                    result.average, result.stdev)
+            if costs is not None:
+                costs.add(result, repetitions, data.compile_time(x))
 
-        output_writer.add(result)
+        output_writer.add(result, data.compile_time(x))
         return result
-    return fn, known_best, percentile
-
-def tune(opts, output_writer):
-    '''Tunes an input program based on the TuningOptions provided'''
-    known_best = percentile = None
-    if opts.source is not None and opts.source.endswith(".csv"):
-        run_test, known_best, percentile = _gen_csv_function(opts.source,
-                output_writer)
-    else:
-        run_test = _gen_tuning_function(opts, output_writer)
+    return fn, data
 
-    def objective(x):
-        out_of_range = TestResult(x, error='Point out of range')
-        if x[0] < opts.num_gangs_min or x[0] > opts.num_gangs_max:
-            return out_of_range
+def tune(opts, output_writer, costs=None):
+    '''Tunes an input program based on the TuningOptions provided
 
-        if x[1] < opts.vector_length_min or x[1] > opts.vector_length_max:
-            return out_of_range
-
-        return run_test(x, repetitions=opts.repetitions)
+    When the source is a CSV file of test data, the simulated cost of the
+    search is recorded in costs, a ReplayCost (a new one for opts, if costs
+    is None) and logged.
 
+    Returns the SearchResult of the search method.
+    '''
     if opts.search_method not in METHODS:
         raise RuntimeError('Unknown search method "{0}"'.format(
                 opts.search_method))
 
-    res = METHODS[opts.search_method](objective, opts)
+    test_data = compiler = store = None
+    runners = []
+    if opts.source is not None and opts.source.endswith(".csv"):
+        if costs is None:
+            costs = ReplayCost(opts.compile_cost,
+                    opts.search_method in RETESTING_METHODS)
+        run_test, test_data = _gen_csv_function(opts.source, output_writer,
+                opts.noise_seed, costs)
+    else:
+        compiler = CompilePool(opts,
+                opts.search_method in RETESTING_METHODS)
+        # Each slot has its own runner, so executables kept running by a
+        # ServerRunner stay on the same device
+        runners = [make_runner(opts) for slot in range(opts.slots)]
+        if opts.slots > 1 and not opts.slot_env:
+            LOGGER.warning('Running %d points at a time, but no --slot-env '
+                    'is given to assign them to different devices',
+                    opts.slots)
+        if opts.store is not None:
+            store = EvaluationStore(opts.store,
+                    EvaluationStore.session_key(opts))
+        run_test = _gen_tuning_function(opts, output_writer, compiler,
+                runners, store)
+
+    def in_range(x):
+        return (opts.num_gangs_min <= x[0] <= opts.num_gangs_max and
+                opts.vector_length_min <= x[1] <= opts.vector_length_max)
+
+    def evaluate(x, slot, repetitions=None):
+        if not in_range(x):
+            return TestResult(x, error='Point out of range')
+
+        return run_test(x, repetitions=repetitions or opts.repetitions,
+                        slot=slot)
+    if test_data is None:
+        scheduler = SlotScheduler(evaluate, opts.slots)
+    else:
+        # Replayed points are tested one at a time, in the order simulated
+        # by replay_many, so that the search does not depend on how threads
+        # are scheduled
+        scheduler = SlotScheduler(evaluate, 1)
+
+    # Search methods may ask for a different number of repetitions than
+    # opts.repetitions, e.g. to screen points quickly before measuring the
+    # best ones precisely
+    def objective(x, repetitions=None):
+        if test_data is not None:
+            costs.start_batch()
+        try:
+            return scheduler.evaluate(x, repetitions=repetitions)
+        finally:
+            if test_data is not None:
+                costs.end_batch()
+
+    def prefetch(points, repetitions=None):
+        # Search methods call this with points they expect to test soon, so
+        # that they can be compiled ahead of time by the CompilePool
+        if compiler is not None:
+            if store is not None and opts.resume:
+                points = [x for x in points if store.lookup(x,
+                          repetitions or opts.repetitions) is None]
+            compiler.prefetch([x for x in points if in_range(x)])
+    objective.prefetch = prefetch
+
+    def evaluate_many(points, repetitions=None, results=None):
+        # Search methods call this with points that do not depend on each
+        # other's results.  They are tested concurrently, one per device
+        # slot, and (point, result) is generated as each one finishes.  A
+        # search that stops early can pass a dict as results to also get the
+        # results of the points still running at the time (see
+        # SlotScheduler.evaluate_many).
+        points = list(points)
+        prefetch(points, repetitions)
+        if test_data is not None:
+            costs.start_batch()
+        tested = None
+        try:
+            if test_data is None:
+                tested = scheduler.evaluate_many(points, results,
+                        repetitions=repetitions)
+            else:
+                tested = replay_many(points, repetitions, results)
+            for x, result in tested:
+                yield x, result
+        finally:
+            # Let the points still running finish within this batch
+            if tested is not None:
+                tested.close()
+            if test_data is not None:
+                costs.end_batch()
+    objective.evaluate_many = evaluate_many
+
+    def replay_many(points, repetitions=None, results=None):
+        # Simulates testing points in opts.slots device slots, using the
+        # recorded results: each point starts on the first slot that becomes
+        # free, and points are generated in the order they would finish.
+        # Before a point is generated, every point that would have started
+        # by then is tested, so a search that stops early still pays for the
+        # points running at the time, as it does on real devices.
+        reps = repetitions or opts.repetitions
+        durations = []
+        for x, result in zip(points, test_data.results(points)):
+            if result is None or not in_range(x):
+                durations.append(0.0)
+            else:
+                durations.append(costs.cost(result, reps,
+                        test_data.compile_time(x)))
+        times = schedule(durations, opts.slots)
+        tested = {} # Index => result
+        for i in sorted(range(len(points)), key=lambda i: times[i][1]):
+            for j in range(len(tested), len(points)):
+                if j > i and times[j][0] >= times[i][1]:
+                    break
+                tested[j] = scheduler.evaluate(points[j],
+                        repetitions=repetitions)
+                if results is not None:
+                    results[points[j]] = tested[j]
+            yield points[i], tested[i]
+
+    try:
+        res = METHODS[opts.search_method](objective, opts)
+    finally:
+        scheduler.close()
+        if compiler is not None:
+            compiler.close()
+        for runner in runners:
+            runner.close()
+        if store is not None:
+            store.close()
 
     LOGGER.info('-- RESULTS --')
     for point in sorted(res.tests, key=lambda x: res.tests[x], reverse=True):
@@ -265,12 +475,16 @@ def tune(opts, output_writer):
     LOGGER.info('Tested %d points', len(res.tests))
     LOGGER.info('Search took %d iterations', res.num_iterations)
     LOGGER.info('Best result found: %s', str(res.tests[res.optimal]))
-    if known_best is not None and percentile is not None:
+    if test_data is not None:
+        known_best = test_data.best()
+        # With simulated noise, the time measured for the best point differs
+        # from the recorded one, which is what the point is judged by
+        found = test_data.result(res.optimal) or res.tests[res.optimal]
         LOGGER.info('Optimal result from test data: %s', str(known_best))
         LOGGER.info('Percentile of best result: %d%%',
-            percentile(res.tests[res.optimal].average))
+            test_data.percentile(found.average))
         try:
-            if known_best.is_signif_diff(res.tests[res.optimal], opts.repetitions):
+            if known_best.is_signif_diff(found, opts.repetitions):
                 LOGGER.warn('BEST RESULT FOUND DIFFERS FROM OPTIMAL RESULT')
             else:
                 LOGGER.info('(No statistically significant difference)')
@@ -278,6 +492,10 @@ def tune(opts, output_writer):
             # T-test will fail if standard deviation is 0 or number of points
             # is 0.  It isn't important, so don't die.
             LOGGER.warn('Unable to perform T-test (%s)', e)
+        LOGGER.info('Simulated time: %.1f seconds compiling and running, '
+            '%.1f seconds with %d slot(s)', costs.total,
+            costs.wall_time(opts.slots), opts.slots)
 
     # Do this afterward, in case writing files fails
     output_writer.write_result(res, opts.repetitions)
+    return res
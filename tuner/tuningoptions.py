@@ -6,6 +6,13 @@ PGCC_COMPILE = ('pgcc -acc -ta=nvidia -DNUM_GANGS={num_gangs} '
 PGCC_COMPILE_KERNEL_TIMING = ('pgcc -acc -DNUM_GANGS={num_gangs} '
                 '-DVECTOR_LENGTH={vector_length} -ta=nvidia,time {source}')
 
+# Default compilation commands when parameters are passed at run time
+PGCC_COMPILE_RUNTIME = 'pgcc -acc -ta=nvidia {source}'
+PGCC_COMPILE_RUNTIME_KERNEL_TIMING = 'pgcc -acc -ta=nvidia,time {source}'
+
+# Flags added to the default compilation command to build a shared library
+PGCC_SHARED_FLAGS = ' -fpic -shared'
+
 # Default regular expression matching the time output
 TIME_RE = r'(?:time)[=:\s]*([\d.]+)'
 
@@ -28,16 +35,43 @@ class TuningOptions(object):
             verbose=False,
             ignore_exit=False,
             kernel_timing=False,
+            compile_jobs=1,
+            cache_dir=None,
+            cache_size=1024,
+            runtime_params=False,
+            server=False,
+            shared_library=False,
+            store=None,
+            resume=False,
+            adaptive=False,
+            ci_width=0.05,
+            timeout_factor=None,
+            compile_timeout=None,
+            run_timeout=None,
+            all_matches=False,
+            warmup=0,
+            slots=1,
+            slot_env=None,
+            budget=None,
+            seed=None,
+            noise_seed=None,
+            compile_cost=0.0,
             **kwargs):
 
         self.source = source
         self.executable = executable
         if compile_command:
             self.compile_command = compile_command
+        elif runtime_params and kernel_timing:
+            self.compile_command = PGCC_COMPILE_RUNTIME_KERNEL_TIMING
+        elif runtime_params:
+            self.compile_command = PGCC_COMPILE_RUNTIME
         elif kernel_timing:
             self.compile_command = PGCC_COMPILE_KERNEL_TIMING
         else:
             self.compile_command = PGCC_COMPILE
+        if shared_library and not compile_command:
+            self.compile_command += PGCC_SHARED_FLAGS
         self.search_method = search_method
         self.repetitions = repetitions
         self.time_regexp = re.compile(time_regexp, re.I)
@@ -51,3 +85,24 @@ class TuningOptions(object):
         self.verbose = verbose
         self.ignore_exit = ignore_exit
         self.kernel_timing = kernel_timing
+        self.compile_jobs = compile_jobs
+        self.cache_dir = cache_dir
+        self.cache_size = cache_size
+        self.runtime_params = runtime_params
+        self.server = server
+        self.shared_library = shared_library
+        self.store = store
+        self.resume = resume
+        self.adaptive = adaptive
+        self.ci_width = ci_width
+        self.timeout_factor = timeout_factor
+        self.compile_timeout = compile_timeout
+        self.run_timeout = run_timeout
+        self.all_matches = all_matches
+        self.warmup = warmup
+        self.slots = slots
+        self.slot_env = slot_env or []
+        self.budget = budget
+        self.seed = seed
+        self.noise_seed = noise_seed
+        self.compile_cost = compile_cost
@@ -1,6 +1,107 @@
+import codecs
+import os
+import signal
 import subprocess
+import sys
+import threading
 
-def call_command(cmd, env=None, fail_on_nonzero=False):
+class CommandTimedOut(Exception):
+    '''Raised by call_command when a command runs longer than its timeout'''
+
+    def __init__(self, cmd, timeout, output):
+        Exception.__init__(self,
+                'Command "{0}" timed out after {1:g} seconds'.format(
+                    cmd, timeout))
+        self.cmd = cmd
+        self.timeout = timeout
+        self.output = output
+
+def start_command(cmd, **kwargs):
+    '''Starts a shell command in a new process group
+
+    Keyword arguments are passed to subprocess.Popen.  Since the command is
+    in its own process group, kill_command can stop it along with any
+    processes it started.
+    '''
+    if sys.version_info >= (3, 2):
+        # preexec_fn is not safe to use when other threads are running
+        kwargs['start_new_session'] = True
+    elif hasattr(os, 'setsid'):
+        kwargs['preexec_fn'] = os.setsid
+    return subprocess.Popen(cmd, shell=True, **kwargs)
+
+def kill_command(handle):
+    '''Kills a command started by start_command and all of its children'''
+    try:
+        if hasattr(os, 'killpg'):
+            os.killpg(handle.pid, signal.SIGKILL)
+        else:
+            handle.kill()
+    except OSError:
+        pass # Already exited
+
+class OutputScanner(object):
+    '''Searches the output of a command for a regular expression as it is
+    produced, without keeping the whole output in memory.
+
+    Output is only searched a line at a time (a match may span up to
+    lookback characters), and searching stops once max_matches matches have
+    been found (or continues to the end if max_matches is None).  Only the
+    last tail_size characters of output are kept, for error messages.
+    '''
+
+    def __init__(self, pattern, max_matches=1, tail_size=16384,
+            lookback=4096):
+        self.pattern = pattern
+        self.max_matches = max_matches
+        self.tail_size = tail_size
+        self.lookback = lookback
+        self.matches = []
+        self.truncated = False
+        self._tail = ''
+        self._pending = ''
+        self._decoder = codecs.getincrementaldecoder('utf8')('replace')
+
+    @property
+    def done(self):
+        return (self.max_matches is not None and
+                len(self.matches) >= self.max_matches)
+
+    @property
+    def output(self):
+        '''The output seen so far, or its last tail_size characters'''
+        if self.truncated:
+            return '[...]' + self._tail
+        return self._tail
+
+    def feed(self, data, final=False):
+        '''Processes a chunk of output (bytes)'''
+        if self.done:
+            return
+        text = self._decoder.decode(data, final)
+        self._tail += text
+        if len(self._tail) > self.tail_size:
+            self._tail = self._tail[-self.tail_size:]
+            self.truncated = True
+
+        self._pending += text
+        end = self._pending.rfind('\n') + 1
+        if final or len(self._pending) - end > self.tail_size:
+            end = len(self._pending) # Don't wait forever for a newline
+        region = self._pending[:end]
+        pos = 0
+        while not self.done:
+            match = self.pattern.search(region, pos)
+            if not match:
+                break
+            self.matches.append(match)
+            pos = max(match.end(), pos + 1)
+        # Keep enough unmatched text for a match spanning several lines
+        self._pending = (region[max(pos, len(region) - self.lookback):] +
+                         self._pending[end:])
+
+def call_command(cmd, env=None, fail_on_nonzero=False, cwd=None,
+        timeout=None, scanner=None, started=None):
     '''Calls a shell command, optionally setting environment variables
 
         cmd -- command to execute
@@ -10,18 +111,65 @@ def call_command(cmd, env=None, fail_on_nonzero=False):
                process, you will need to merge them.
         fail_on_nonzero -- if True, an exception will be raised if the return
                            code of the called command is nonzero.
+        cwd -- directory to run the command in (default: the current
+               directory)
+        timeout -- if not None, the command and every process it started are
+                   killed after this many seconds, and CommandTimedOut is
+                   raised.
+        scanner -- if not None, an OutputScanner that the output is fed to as
+                   it is produced.  The output returned is then only the tail
+                   kept by the scanner.
+        started -- if not None, a function that is called with the handle of
+                   the command once it has started, e.g., so that another
+                   thread can kill it with kill_command.
 
         Returns a tuple (output, returncode)
     '''
 
-    handle = subprocess.Popen(cmd,
+    handle = start_command(cmd,
             stdout=subprocess.PIPE,
             stderr=subprocess.STDOUT, # Redirect stderr to stdout
             env=env,
-            shell=True)
+            cwd=cwd)
+    if started is not None:
+        started(handle)
 
-    stdout, _ = handle.communicate()
-    stdout = stdout.decode('utf8')
+    timed_out = []
+    def expire():
+        timed_out.append(True)
+        kill_command(handle)
+
+    timer = None
+    if timeout is not None:
+        timer = threading.Timer(timeout, expire)
+        timer.daemon = True
+        timer.start()
+
+    try:
+        if scanner is None:
+            stdout, _ = handle.communicate()
+            stdout = stdout.decode('utf8', 'replace')
+        else:
+            fd = handle.stdout.fileno()
+            while True:
+                # Output after the scanner is done is read but discarded
+                chunk = os.read(fd, 65536)
+                if not chunk:
+                    break
+                scanner.feed(chunk)
+            scanner.feed(b'', final=True)
+            handle.stdout.close()
+            handle.wait()
+            stdout = scanner.output
+    finally:
+        if timer is not None:
+            timer.cancel()
+        # Clean up any processes the command left behind (or the command
+        # itself, if the tuner was interrupted)
+        kill_command(handle)
+
+    if timed_out:
+        raise CommandTimedOut(cmd, timeout, stdout)
 
     if handle.returncode != 0 and fail_on_nonzero:
         err = subprocess.CalledProcessError(handle.returncode, cmd)
@@ -29,3 +177,8 @@ def call_command(cmd, env=None, fail_on_nonzero=False):
         raise err
 
     return stdout, handle.returncode
+
+def point_prefix(point):
+    '''Returns the prefix used when logging messages about a point'''
+    return '[num_gangs:{0:>4.0f}, vector_length:{1:>4.0f}]'.format(
+            point[0], point[1])